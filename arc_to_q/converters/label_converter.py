@@ -1,3 +1,4 @@
+import logging
 import re
 
 from qgis.core import (
@@ -17,6 +18,8 @@ from arc_to_q.converters.utils import parse_color
 from arc_to_q.converters.label_vbscript_converter import convert_label_expression
 from arc_to_q.converters.label_domain_converter import domain_to_case_expression
 
+logger = logging.getLogger(__name__)
+
 
 def _parse_arcade_expression(expression: str) -> str:
     """Convert a simple Arcade expression to QGIS expression.
@@ -88,7 +91,7 @@ def _make_label_settings(layer: QgsVectorLayer, label_class: dict, layer_def: di
                 expression = domain_expression
                 is_expression = True
         except Exception as e:
-            print(f"Warning: Failed to resolve coded value domain for label field '{expression}': {e}")
+            logger.warning("Failed to resolve coded value domain for label field '%s': %s", expression, e)
             # Proceed without domain conversion (keep original expression)
 
     # --- Text Format ---
@@ -256,7 +259,7 @@ def set_labels(layer: QgsVectorLayer, layer_def: dict):
     layer_name = layer_def.get('name', 'Unknown Layer')
 
     if not label_classes:
-        print(f"No label classes found for layer: {layer_name}")
+        logger.debug("No label classes found for layer: %s", layer_name)
         return
 
     if len(label_classes) > 1:
@@ -1,11 +1,27 @@
 """Converts ArcGIS Pro layer files (.lyrx) to QGIS layer files (.qlr)."""
 
 import json
+import logging
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from multiprocessing.util import Finalize
+import mmap
 from pathlib import Path
 import re
 import io
-import tempfile
+
+from lxml import etree
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _HAS_ORJSON = True
+except ImportError:
+    _json_loads = json.loads
+    _HAS_ORJSON = False
 
 from qgis.core import (
     QgsApplication,
@@ -15,6 +31,7 @@ from qgis.core import (
     QgsVirtualLayerDefinition,
     QgsLayerDefinition,
     QgsReadWriteContext,
+    QgsPathResolver,
     QgsLayerTreeGroup,
     QgsProject,
     QgsDataSourceUri,
@@ -22,6 +39,7 @@ from qgis.core import (
     QgsVectorLayerJoinInfo,
     Qgis
 )
+from qgis.PyQt.QtXml import QDomDocument
 
 
 from arc_to_q.converters.vector.vector_renderer import VectorRenderer
@@ -31,11 +49,65 @@ from arc_to_q.converters.raster.raster_renderer import (
     switch_to_relative_path,
 )
 
+logger = logging.getLogger(__name__)
+
+# VectorRenderer keeps no per-layer state, so one instance serves every layer
+_VECTOR_RENDERER = VectorRenderer()
+
+
+# Patterns used to pull the workspace/dataset out of XML data connections
+_RE_WS_CONN = re.compile(r"<WorkspaceConnectionString>DATABASE=([^<]+)</WorkspaceConnectionString>")
+_RE_DATASET = re.compile(r"<Dataset>([^<]+)</Dataset>")
+_RE_PATHNAME = re.compile(r"<PathName>([^<]+)</PathName>")
+_RE_RASTER_NAME = re.compile(
+    r"RasterDatasetName[^>]*>.*?<Name>([^<]+\.(?:png|tif|tiff|jpg|jpeg|img|sid|ecw))</Name>",
+    re.IGNORECASE | re.DOTALL
+)
+_RE_NAME_ANY = re.compile(r"<Name>([^<]+)</Name>")
+
+# Raster file extensions, and <Name> words that indicate a raster function rather than a file
+_RASTER_EXTS = (".png", ".tif", ".tiff", ".jpg", ".jpeg", ".img", ".sid", ".ecw")
+_FUNCTION_WORDS = ("function", "geometric", "transform")
+
+# Normalizes capitalized data connection keys to the camelCase used in .lyrx JSON
+_DC_KEY_MAP = {
+    "WorkspaceConnectionString": "workspaceConnectionString",
+    "WorkspaceFactory": "workspaceFactory",
+    "Dataset": "dataset",
+    "DatasetType": "datasetType",
+    "Type": "type",
+}
+
+# Translation table that strips square brackets from field names in queries
+_BRACKET_TBL = str.maketrans("", "", "[]")
+
+# Output .qlr files are written with one large buffered write.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# .lyrx files at least this large are memory-mapped rather than read into bytes
+_MMAP_THRESHOLD = 4 << 20
+
+# Layers already built during the current conversion, keyed by (in_folder, uRI).
+# A member referenced from more than one group is cloned instead of rebuilt.
+# Cleared at the end of every convert_lyrx call.
+_LAYER_CACHE = {}
+
+
+@lru_cache(maxsize=1024)
+def _resolved(path_str: str) -> Path:
+    """Resolve a path once; repeated lookups for the same folder skip the filesystem."""
+    return Path(path_str).resolve()
 
 
 def _open_lyrx(lyrx):
-    with open(lyrx, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Both parsers accept UTF-8 bytes, so skip the text decoding layer
+    with open(lyrx, 'rb') as f:
+        if _HAS_ORJSON and os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+            # orjson reads straight from the mapped pages; no bytes copy of the file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                data = _json_loads(view)
+        else:
+            data = _json_loads(f.read())
 
     layers = data.get("layers", [])
     if len(layers) != 1:
@@ -44,6 +116,26 @@ def _open_lyrx(lyrx):
     return data
 
 
+@lru_cache(maxsize=8)
+def _open_lyrx_cached(path, mtime_ns, size):
+    """
+    Parses a .lyrx and indexes its layer definitions by uRI, memoized per process.
+
+    mtime_ns and size only key the cache, so an edited file is parsed again. The
+    returned objects are shared between calls and must be treated as read-only.
+    Parsed documents can be many MB, and a batch run sees each file once, so only
+    the few most recent are kept.
+    """
+    lyrx = _open_lyrx(path)
+    return lyrx, {ld.get("uRI"): ld for ld in lyrx.get("layerDefinitions", [])}
+
+
+def _open_lyrx_indexed(lyrx):
+    """Returns (lyrx, layer_def_by_uri) for a .lyrx path, from cache if the file is unchanged."""
+    st = os.stat(lyrx)
+    return _open_lyrx_cached(os.path.abspath(lyrx), st.st_mtime_ns, st.st_size)
+
+
 def _parse_definition_query(layer_def: dict):
     """
     Parses the definition query (or "subset string") into a valid one for a QGIS layer.
@@ -71,22 +163,35 @@ def _parse_definition_query(layer_def: dict):
     if definition_query:
         # Replace ArcGIS-style operators with QGIS-compatible ones
         # ArcGIS uses '<>' for 'not equal', QGIS uses '!='
-        qgis_query = definition_query.replace("<>", "!=")
+        # Any square brackets around field names are removed in a single pass.
+        # Both rewrites are skipped when there's nothing for them to change.
+        qgis_query = definition_query
+        if "<>" in qgis_query:
+            qgis_query = qgis_query.replace("<>", "!=")
+        if "[" in qgis_query or "]" in qgis_query:
+            qgis_query = qgis_query.translate(_BRACKET_TBL)
 
-        # Remove any square brackets around field names
-        qgis_query = qgis_query.replace("[", "").replace("]", "")
         # Return the query string with the pipe delimiter for QGIS
         return f"|subset={qgis_query}"
     return ""
 
+def _raster_connection(path, dataset):
+    """Builds the data connection dict for a file-based raster found in an XML connection."""
+    return {
+        "workspaceConnectionString": f"DATABASE={path}",
+        "dataset": dataset,
+        "workspaceFactory": "Raster",
+        "datasetType": "esriDTRasterDataset"
+    }
+
 def _parse_xml_dataconnection(xml_string: str) -> dict | None:
     """
     Parses complex XML data connection strings to extract raster path and dataset.
 
     Some .lyrx files, especially those involving raster functions or complex sources,
     store the data connection as a nested XML string instead of a simple dictionary.
-    This function attempts to extract the key workspace and dataset information
-    using several regular expression patterns.
+    The XML is read in a single streaming pass; if it isn't well-formed, the
+    regular expression fallback is used instead.
 
     Args:
         xml_string (str): The XML content from the 'dataConnection' or 'dataset' field.
@@ -95,64 +200,142 @@ def _parse_xml_dataconnection(xml_string: str) -> dict | None:
         dict | None: A dictionary with 'workspaceConnectionString', 'dataset', 'workspaceFactory',
                       and 'datasetType' keys, or None if parsing fails.
     """
+    try:
+        return _scan_xml_dataconnection(xml_string)
+    except etree.XMLSyntaxError:
+        return _parse_xml_dataconnection_regex(xml_string)
+
+def _scan_xml_dataconnection(xml_string: str) -> dict | None:
+    """
+    Single-pass iterparse equivalent of the three regex methods below, applied in the
+    same order of preference. Stops as soon as Method 1 has both of its values.
+    """
+    ws_path = dataset = path = raster_name = fallback_name = None
+    in_raster_dataset_name = False
+
+    # The XML comes from the user's .lyrx, so never expand entities or fetch
+    # anything over the network; data connection strings are small, so the
+    # default libxml2 size limits stay on too
+    events = etree.iterparse(
+        io.BytesIO(xml_string.encode('utf-8')), events=("start", "end"),
+        resolve_entities=False, no_network=True,
+    )
+    for event, elem in events:
+        tag = elem.tag.rpartition('}')[2]
+        if event == "start":
+            # ESRI usually marks the section with xsi:type="typens:RasterDatasetName"
+            if not in_raster_dataset_name and (
+                tag == "RasterDatasetName"
+                or any(v.endswith("RasterDatasetName") for v in elem.attrib.values())
+            ):
+                in_raster_dataset_name = True
+            continue
+
+        text = (elem.text or "").strip()
+        if text:
+            if tag == "WorkspaceConnectionString":
+                if ws_path is None and text.startswith("DATABASE="):
+                    ws_path = text[len("DATABASE="):].strip().rstrip(';')
+            elif tag == "Dataset":
+                if dataset is None:
+                    dataset = text
+            elif tag == "PathName":
+                if path is None:
+                    path = text
+            elif tag == "Name":
+                lname = text.lower()
+                if lname.endswith(_RASTER_EXTS):
+                    if in_raster_dataset_name and raster_name is None:
+                        raster_name = text
+                    if fallback_name is None and not any(word in lname for word in _FUNCTION_WORDS):
+                        fallback_name = text
+        elem.clear()
+
+        # Method 1: a standard CIMDataConnection format within the XML
+        if ws_path and dataset:
+            return _raster_connection(ws_path, dataset)
+
+    # Method 2: complex nested XML (e.g., XmlRasterDataset with GeometricFunction)
+    if path and raster_name and "XmlRasterDataset" in xml_string:
+        return _raster_connection(path, raster_name)
+
+    # Method 3: any path and a plausible-looking dataset name
+    if path and fallback_name:
+        return _raster_connection(path, fallback_name)
+
+    return None
+
+def _parse_xml_dataconnection_regex(xml_string: str) -> dict | None:
+    """
+    Regular expression fallback for _parse_xml_dataconnection, used when the XML
+    can't be parsed.
+    """
     # Method 1: Look for a standard CIMDataConnection format within the XML.
-    ws_match = re.search(r"<WorkspaceConnectionString>DATABASE=([^<]+)</WorkspaceConnectionString>", xml_string)
-    dataset_match = re.search(r"<Dataset>([^<]+)</Dataset>", xml_string)
+    ws_match = _RE_WS_CONN.search(xml_string)
+    dataset_match = _RE_DATASET.search(xml_string)
     if ws_match and dataset_match:
         path = ws_match.group(1).strip().rstrip(';')
         dataset = dataset_match.group(1).strip()
-        return {
-            "workspaceConnectionString": f"DATABASE={path}",
-            "dataset": dataset,
-            "workspaceFactory": "Raster",
-            "datasetType": "esriDTRasterDataset"
-        }
+        return _raster_connection(path, dataset)
 
     # Method 2: Handle complex nested XML (e.g., XmlRasterDataset with GeometricFunction).
     # This format often buries the true path and filename in different tags.
     if "XmlRasterDataset" in xml_string:
-        path_match = re.search(r"<PathName>([^<]+)</PathName>", xml_string)
+        path_match = _RE_PATHNAME.search(xml_string)
         # The actual filename is often in a <Name> tag inside a RasterDatasetName section.
-        raster_section_match = re.search(
-            r"RasterDatasetName[^>]*>.*?<Name>([^<]+\.(?:png|tif|tiff|jpg|jpeg|img|sid|ecw))</Name>",
-            xml_string,
-            re.IGNORECASE | re.DOTALL
-        )
+        raster_section_match = _RE_RASTER_NAME.search(xml_string)
         if path_match and raster_section_match:
             path = path_match.group(1).strip()
             dataset = raster_section_match.group(1).strip()
-            return {
-                "workspaceConnectionString": f"DATABASE={path}",
-                "dataset": dataset,
-                "workspaceFactory": "Raster",
-                "datasetType": "esriDTRasterDataset"
-            }
+            return _raster_connection(path, dataset)
 
     # Method 3: Fallback to find any path and a plausible-looking dataset name.
-    path_match = re.search(r"<PathName>([^<]+)</PathName>", xml_string)
-    name_matches = re.findall(r"<Name>([^<]+)</Name>", xml_string)
+    path_match = _RE_PATHNAME.search(xml_string)
+    name_matches = _RE_NAME_ANY.findall(xml_string)
     dataset = None
     for name in name_matches:
-        # Skip names that are likely function types.
-        if not any(word in name.lower() for word in ['function', 'geometric', 'transform']):
-            # Check if it looks like a filename (has a common image extension).
-            if '.' in name and any(name.lower().endswith(ext) for ext in ['.png', '.tif', '.tiff', '.jpg', '.jpeg', '.img', '.sid', '.ecw']):
-                dataset = name.strip()
-                break # Found a suitable dataset name
+        lname = name.lower()
+        # It must look like a filename (has a common image extension) and not be
+        # a function type; the C-level extension test runs first.
+        if lname.endswith(_RASTER_EXTS) and not any(word in lname for word in _FUNCTION_WORDS):
+            dataset = name.strip()
+            break # Found a suitable dataset name
 
     if path_match and dataset:
         path = path_match.group(1).strip()
-        return {
-            "workspaceConnectionString": f"DATABASE={path}",
-            "dataset": dataset,
-            "workspaceFactory": "Raster",
-            "datasetType": "esriDTRasterDataset"
-        }
+        return _raster_connection(path, dataset)
 
     return None
 
+def _looks_like_xml(value) -> bool:
+    """Cheap check for an embedded XML document (CIM XML always opens with a tag)."""
+    return isinstance(value, str) and value.lstrip().startswith('<')
+
+def _gdb_layer_uri(path, dataset):
+    return f"{path}|layername={dataset}"
+
+def _file_uri(path, dataset):
+    # A drive or filesystem root already ends in '/' ("C:/", "/")
+    return f"{path.rstrip('/')}/{dataset}"
+
+def _ensure_shp(uri):
+    # Only the last four characters need lowercasing to test the suffix
+    return uri if uri[-4:].lower() == ".shp" else uri + ".shp"
+
+# URI builders for the FileGDB dataset types we know how to open
+_FILEGDB_URI_BUILDERS = {
+    "esriDTFeatureClass": _gdb_layer_uri,
+    "esriDTTable": _gdb_layer_uri,
+    "esriDTRasterDataset": _file_uri,
+}
+
+@lru_cache(maxsize=512)
 def _make_uris(in_folder, conn_str, factory, dataset, dataset_type, def_query, out_file):
     """Helper to build absolute/relative URIs and determine provider type.
+
+    Results are memoized, since group layers often point several sublayers at the
+    same dataset. The key includes out_file, so raise maxsize if one process
+    converts many projects to different targets.
     
     Args:
         in_folder (str): Path to the folder containing the .lyrx file.
@@ -198,50 +381,37 @@ def _make_uris(in_folder, conn_str, factory, dataset, dataset_type, def_query, o
     else:
         raw_path = conn_str
 
-    lyrx_dir = Path(in_folder)
-    abs_path = (lyrx_dir / raw_path).resolve()
-
-    provider = "ogr" # Default to OGR for vector files
+    abs_path = _resolved(os.path.join(in_folder, raw_path))
 
-    # Absolute URI
     if factory == "FileGDB":
-        if dataset_type == "esriDTFeatureClass" or dataset_type == "esriDTTable":
-            abs_uri = f"{abs_path.as_posix()}|layername={dataset}"
-        elif dataset_type == "esriDTRasterDataset":
-            abs_uri = os.path.join(abs_path.as_posix(), dataset)
-            provider = "gdal"
-        else:
+        build_uri = _FILEGDB_URI_BUILDERS.get(dataset_type)
+        if build_uri is None:
             raise NotImplementedError(f"Unsupported FileGDB dataset type: {dataset_type}")
     else:
         # Shapefiles, Rasters, etc.
-        abs_uri = os.path.join(abs_path.as_posix(), dataset)
-        if dataset_type == "esriDTRasterDataset":
-            provider = "gdal"
+        build_uri = _file_uri
+
+    # Rasters open through GDAL, everything else defaults to OGR
+    provider = "gdal" if dataset_type == "esriDTRasterDataset" else "ogr"
+
+    # Absolute URI
+    abs_posix = abs_path.as_posix()
+    abs_uri = build_uri(abs_posix, dataset)
 
     # Relative URI
-    out_dir = Path(out_file).parent.resolve()
+    out_dir = _resolved(os.path.dirname(out_file))
     try:
-        rel_path = Path(os.path.relpath(abs_path, start=out_dir))
+        rel_posix = os.path.relpath(abs_path, start=out_dir).replace(os.sep, '/')
     except ValueError:
         # If paths are on different drives, relpath fails. Fallback to absolute.
-        rel_path = abs_path
+        rel_posix = abs_posix
 
-    if factory == "FileGDB":
-        if dataset_type == "esriDTFeatureClass" or dataset_type == "esriDTTable":
-            rel_uri = f"{rel_path.as_posix()}|layername={dataset}"
-        elif dataset_type == "esriDTRasterDataset":
-            rel_uri = os.path.join(rel_path.as_posix(), dataset)
-        else:
-            raise NotImplementedError(f"Unsupported FileGDB dataset type: {dataset_type}")
-    else:
-        rel_uri = os.path.join(rel_path.as_posix(), dataset)
+    rel_uri = build_uri(rel_posix, dataset)
 
     if dataset_type == "esriDTFeatureClass":
         if factory == "Shapefile":
-            if not rel_uri.lower().endswith(".shp"):
-                rel_uri += ".shp"
-            if not abs_uri.lower().endswith(".shp"):
-                abs_uri += ".shp"
+            abs_uri = _ensure_shp(abs_uri)
+            rel_uri = _ensure_shp(rel_uri)
 
         if def_query:
             abs_uri += def_query
@@ -249,6 +419,21 @@ def _make_uris(in_folder, conn_str, factory, dataset, dataset_type, def_query, o
 
     return abs_uri, rel_uri, provider
 
+def _direct_uris(in_folder, data_connection, def_query, out_file):
+    """Build URIs for a direct workspace connection (FileGDB, Shapefile, Raster).
+
+    Returns:
+        tuple: (abs_uri, rel_uri, provider), or None if the connection is not direct.
+    """
+    factory = data_connection.get("workspaceFactory")
+    conn_str = data_connection.get("workspaceConnectionString", "")
+    dataset = data_connection.get("dataset")
+
+    if factory and conn_str and dataset:
+        dataset_type = data_connection.get("datasetType")
+        return _make_uris(in_folder, conn_str, factory, dataset, dataset_type, def_query, out_file)
+    return None
+
 def _parse_source(in_folder, data_connection, def_query, out_file):
     """Build both absolute and relative QGIS-friendly URIs for a dataset.
     
@@ -267,14 +452,10 @@ def _parse_source(in_folder, data_connection, def_query, out_file):
           - join_info: dict describing join (or None if not a join)
         tuple: ( (abs_uri, rel_uri, provider), join_info )
     """
-    factory = data_connection.get("workspaceFactory")
-    conn_str = data_connection.get("workspaceConnectionString", "")
-    dataset = data_connection.get("dataset")
-    dataset_type = data_connection.get("datasetType")
-
     # --- Handle direct connections (FileGDB, Shapefile, Raster) ---
-    if factory and conn_str and dataset:
-        return _make_uris(in_folder, conn_str, factory, dataset, dataset_type, def_query, out_file), None
+    uris = _direct_uris(in_folder, data_connection, def_query, out_file)
+    if uris:
+        return uris, None
 
     # --- Handle table join (CIMRelQueryTableDataConnection) ---
     if data_connection.get("type") == "CIMRelQueryTableDataConnection":
@@ -284,8 +465,13 @@ def _parse_source(in_folder, data_connection, def_query, out_file):
         source = data_connection.get("sourceTable", {})
         dest = data_connection.get("destinationTable", {})
 
-        (abs_uri, rel_uri, src_provider), _ = _parse_source(in_folder, source, "", out_file)
-        (abs_table_uri, rel_table_uri, dest_provider), _ = _parse_source(in_folder, dest, "", out_file)
+        # Direct tables are the common case; a table that is itself a join (how
+        # ArcGIS stores multiple joins) resolves to its inner source's URIs
+        src_uris = _direct_uris(in_folder, source, "", out_file) or _parse_source(in_folder, source, "", out_file)[0]
+        dest_uris = _direct_uris(in_folder, dest, "", out_file) or _parse_source(in_folder, dest, "", out_file)[0]
+
+        abs_uri, rel_uri, src_provider = src_uris
+        abs_table_uri, rel_table_uri, dest_provider = dest_uris
 
         join_info = {
             "primaryKey": data_connection.get("primaryKey"),
@@ -312,7 +498,7 @@ def _set_layer_transparency(layer: QgsMapLayer, layer_def: dict):
 
 def _set_scale_visibility(layer: QgsMapLayer, layer_def: dict):
     """Set the scale visibility for a QGIS layer based on the ArcGIS layer definition."""
-    scale_opts = layer_def.get("layerScaleVisibilityOptions", {})
+    scale_opts = layer_def.get("layerScaleVisibilityOptions")
     if scale_opts:
         if scale_opts.get("type") != "CIMLayerScaleVisibilityOptions":
             raise Exception(f"Unexpected layer scale visibility options type: {scale_opts.get('type')}")
@@ -361,7 +547,7 @@ def _set_temporal_properties(layer: QgsVectorLayer, layer_def: dict):
             tprops.setMode(Qgis.VectorTemporalMode.FeatureDateTimeInstantFromField)
             
         tprops.setStartField(start_field)
-        print(f"Enabled temporal properties for '{layer.name()}'. Start: {start_field}, End: {end_field}")
+        logger.debug("Enabled temporal properties for '%s'. Start: %s, End: %s", layer.name(), start_field, end_field)
 
 
 def _set_metadata(layer: QgsVectorLayer, layer_def: dict):
@@ -372,24 +558,26 @@ def _set_metadata(layer: QgsVectorLayer, layer_def: dict):
         layer (QgsVectorLayer): The in-memory QGIS layer object to modify.
         layer_def (dict): The parsed JSON dictionary of an ArcGIS layer definition.
     """
-    md = layer.metadata()
     title = layer_def.get("name", "")
-    if title:
-        md.setTitle(title)
-
     if layer_def.get("useSourceMetadata", False) == False:
         attribution = layer_def.get("attribution", "")
         description = layer_def.get("description", "")
-        if attribution:
-            md.setRights([attribution])
-        if description:
-            md.setAbstract(description)
     else:
         attribution = ""
         description = ""
 
-    if attribution or description or title:
-        layer.setMetadata(md)
+    # Only copy the layer's metadata out of QGIS if there's something to change
+    if not (attribution or description or title):
+        return
+
+    md = layer.metadata()
+    if title:
+        md.setTitle(title)
+    if attribution:
+        md.setRights([attribution])
+    if description:
+        md.setAbstract(description)
+    layer.setMetadata(md)
 
 
 def _set_display_field(layer: QgsVectorLayer, layer_def: dict):
@@ -428,20 +616,21 @@ def _set_field_aliases_and_visibility(layer: QgsVectorLayer, layer_def: dict):
     # Build a mapping of field name to alias and visibility
     alias_map = {}
     visible_fields = set()
+    add_visible = visible_fields.add
     for field in fields_info:
         name = field.get("fieldName")
-        alias = field.get("alias", name)
-        visible = field.get("visible", True)
-        if name:
-            alias_map[name] = alias
-            if visible:
-                visible_fields.add(name)
-
-    # Apply aliases
-    for idx, qgs_field in enumerate(layer.fields()):
-        field_name = qgs_field.name()
-        if field_name in alias_map:
-            layer.setFieldAlias(idx, alias_map[field_name])
+        if not name:
+            continue
+        alias_map[name] = field.get("alias", name)
+        if field.get("visible", True):
+            add_visible(name)
+
+    # Apply aliases, looking up only the fields the .lyrx describes
+    qgs_fields = layer.fields()
+    for name, alias in alias_map.items():
+        idx = qgs_fields.indexFromName(name)
+        if idx >= 0:
+            layer.setFieldAlias(idx, alias)
 
     # Configure attribute table visibility
     table_config = layer.attributeTableConfig()
@@ -456,7 +645,22 @@ def _set_field_aliases_and_visibility(layer: QgsVectorLayer, layer_def: dict):
     table_config.setColumns(new_columns)
     layer.setAttributeTableConfig(table_config)
 
-def _convert_feature_layer(in_folder, layer_def, out_file, project):
+def _register_layer(project, layer, pending_layers=None):
+    """Adds a layer to the project registry (not the legend), or queues it for one batched add."""
+    if pending_layers is None:
+        project.addMapLayer(layer, False)
+    else:
+        pending_layers.append(layer)
+
+def _convert_feature_layer(in_folder, layer_def, out_file, project, pending_layers=None):
+    cache_key = (in_folder, layer_def.get("uRI"))
+    cached = _LAYER_CACHE.get(cache_key)
+    if cached is not None:
+        # The join table is already in the tree from the first build
+        layer = cached.clone()
+        _register_layer(project, layer, pending_layers)
+        return layer, None
+
     layer_name = layer_def['name']
     f_table = layer_def["featureTable"]
     if f_table["type"] != "CIMFeatureTable":
@@ -467,27 +671,28 @@ def _convert_feature_layer(in_folder, layer_def, out_file, project):
     (abs_uri, rel_uri, provider), join_info = _parse_source(in_folder, f_table["dataConnection"], def_query, out_file)
 
     # 1. Always load the primary layer directly first
-    #print(f"Loading layer '{layer_name}' with provider '{provider}' at {abs_uri}")
+    logger.debug("Loading layer '%s' with provider '%s' at %s", layer_name, provider, abs_uri)
     layer = QgsVectorLayer(abs_uri, layer_name, provider)
 
     if not layer.isValid():
         raise RuntimeError(f"Layer failed to load: {layer_name} {abs_uri} (Provider: {provider})")
 
-    # Relative path fallback (for OGR)
-    if provider == "ogr":
-        test_layer = QgsVectorLayer(rel_uri, f"test_{layer_name}", "ogr")
-        if test_layer.isValid():
-            layer.setDataSource(rel_uri, layer.name(), layer.providerType())
-            if not layer.isValid():
-                layer = QgsVectorLayer(abs_uri, layer_name, "ogr")
+    # Switch to the relative path (for OGR), reverting to the absolute one if it won't load.
+    # With relative path storage (the default) _export_qlr's path resolver already writes
+    # the source relative to the .qlr, so the layer stays on abs_uri and is opened once.
+    if (provider == "ogr" and rel_uri != abs_uri
+            and project.filePathStorage() == Qgis.FilePathType.Absolute):
+        layer.setDataSource(rel_uri, layer.name(), layer.providerType())
+        if not layer.isValid():
+            layer.setDataSource(abs_uri, layer.name(), layer.providerType())
 
     # Add main layer to project (Registry only, not Legend/Tree yet)
-    project.addMapLayer(layer, False)
+    _register_layer(project, layer, pending_layers)
 
     # 2. Apply join if present
     join_layer = None
     if join_info:
-        #print(f"  Applying native join to '{join_info['destinationName']}'...")
+        logger.debug("Applying native join to '%s'", join_info['destinationName'])
 
         join_table_uri = join_info["destinationAbs"]
         join_table_name = join_info['destinationName']
@@ -497,7 +702,7 @@ def _convert_feature_layer(in_folder, layer_def, out_file, project):
 
         if join_layer.isValid():
             # Add join layer to project (Registry only)
-            project.addMapLayer(join_layer, False)
+            _register_layer(project, join_layer, pending_layers)
 
             # Create and apply the join
             qgs_join = QgsVectorLayerJoinInfo()
@@ -511,12 +716,11 @@ def _convert_feature_layer(in_folder, layer_def, out_file, project):
             layer.addJoin(qgs_join)
             layer.updateFields() # Critical for Identify tool
         else:
-            print(f"  WARNING: Failed to load join table: {join_table_uri}")
+            logger.warning("Failed to load join table: %s", join_table_uri)
 
     # Set other layer properties
     _set_display_field(layer, layer_def)
-    renderer_factory = VectorRenderer()
-    qgis_renderer = renderer_factory.create_renderer(layer_def.get("renderer", {}), layer, full_layer_def=layer_def)
+    qgis_renderer = _VECTOR_RENDERER.create_renderer(layer_def.get("renderer", {}), layer, full_layer_def=layer_def)
     layer.setRenderer(qgis_renderer)
     _set_field_aliases_and_visibility(layer, layer_def)
     set_labels(layer, layer_def)
@@ -525,11 +729,24 @@ def _convert_feature_layer(in_folder, layer_def, out_file, project):
     if not layer.isValid():
         raise RuntimeError(f"Layer became invalid after setting properties: {layer_name}")
 
+    if cache_key[1] is not None:
+        _LAYER_CACHE[cache_key] = layer
+
     # Return both layers so the caller can add them to the layer tree/QLR
     return layer, join_layer
 
 
-def _convert_raster_layer(in_folder, layer_def, out_file, project):
+def _format_raster_error(abs_uri, layer_name):
+    """Builds the load-failure message for a raster; only touches the filesystem when called."""
+    error_msg = f"Raster layer failed to load: {layer_name}"
+    if os.path.exists(abs_uri):
+        error_msg += f"\nFile exists at '{abs_uri}' but GDAL could not open it. Check format or permissions."
+    else:
+        error_msg += f"\nFile not found at '{abs_uri}'."
+    return error_msg
+
+
+def _convert_raster_layer(in_folder, layer_def, out_file, project, pending_layers=None, precompute_histograms=False):
     """
     Creates a QgsRasterLayer from a CIMRasterLayer definition.
 
@@ -542,12 +759,21 @@ def _convert_raster_layer(in_folder, layer_def, out_file, project):
         layer_def (dict): The layer definition dictionary from the parsed .lyrx JSON.
         out_file (str): The path for the output .qlr file.
         project (QgsProject): The active QgsProject instance.
+        pending_layers (list, optional): If given, the layer is appended here for a
+            batched addMapLayers call instead of being registered immediately.
     Returns:
         QgsRasterLayer: The created and configured QGIS raster layer.
     Raises:
         RuntimeError: If the data connection is missing or cannot be parsed, or if the
                       raster layer fails to load.
     """
+    cache_key = (in_folder, layer_def.get("uRI"))
+    cached = _LAYER_CACHE.get(cache_key)
+    if cached is not None:
+        rlayer = cached.clone()
+        _register_layer(project, rlayer, pending_layers)
+        return rlayer
+
     layer_name = layer_def.get("name", "Raster")
     data_connection = layer_def.get("dataConnection")
 
@@ -555,13 +781,14 @@ def _convert_raster_layer(in_folder, layer_def, out_file, project):
         raise RuntimeError(f"Raster layer '{layer_name}' is missing the 'dataConnection' definition.")
 
     if isinstance(data_connection, str):
-        parsed_connection = _parse_xml_dataconnection(data_connection)
+        # Only run the regex chain over strings that are actually XML
+        parsed_connection = _looks_like_xml(data_connection) and _parse_xml_dataconnection(data_connection)
         if not parsed_connection:
             raise RuntimeError(f"Failed to parse XML data connection for raster layer: {layer_name}")
         data_connection = parsed_connection
     elif isinstance(data_connection, dict):
         dataset_value = data_connection.get('dataset', '')
-        if isinstance(dataset_value, str) and '<' in dataset_value:
+        if _looks_like_xml(dataset_value):
             parsed_connection = _parse_xml_dataconnection(dataset_value)
             if parsed_connection:
                 if 'workspaceConnectionString' in data_connection and parsed_connection.get('workspaceConnectionString') in (None, 'DATABASE='):
@@ -573,7 +800,7 @@ def _convert_raster_layer(in_folder, layer_def, out_file, project):
     if not isinstance(data_connection, dict):
         raise RuntimeError(f"Unexpected data_connection type: {type(data_connection)} for layer {layer_name}")
 
-    data_connection = {k[0].lower() + k[1:]: v for k, v in data_connection.items()}
+    data_connection = {_DC_KEY_MAP.get(k, k): v for k, v in data_connection.items()}
 
     # Unpack the new 3-item tuple (abs, rel, provider), ignoring provider for now as we default to gdal
     (abs_uri, rel_uri, provider), _ = _parse_source(in_folder, data_connection, "", out_file)
@@ -594,51 +821,85 @@ def _convert_raster_layer(in_folder, layer_def, out_file, project):
             os.environ.pop('CPL_LOG', None)
 
     if not rlayer or not rlayer.isValid():
-        error_msg = f"Raster layer failed to load: {layer_name}"
-        if os.path.exists(abs_uri):
-            error_msg += f"\nFile exists at '{abs_uri}' but GDAL could not open it. Check format or permissions."
-        else:
-            error_msg += f"\nFile not found at '{abs_uri}'."
-        raise RuntimeError(error_msg)
+        raise RuntimeError(_format_raster_error(abs_uri, layer_name))
 
-    # Switch path (only for file-based gdal layers)
-    if raster_provider == "gdal":
-        try:
-            test_layer = QgsRasterLayer(rel_uri, "test", "gdal")
-            if test_layer.isValid():
+    # Switch path (only for file-based gdal layers, and only if it actually differs)
+    if raster_provider == "gdal" and rel_uri != abs_uri:
+        # A stat stands in for opening a whole probe layer; rel_uri resolves the
+        # same way here as it does when the data source is switched
+        if os.path.exists(rel_uri):
+            try:
                 switch_to_relative_path(rlayer, rel_uri)
-        except Exception as e:
-            print(f"Warning: Could not set relative path for raster layer '{layer_name}'; using absolute path in QLR. Error: {e}")
+            except Exception as e:
+                rlayer.setDataSource(abs_uri, layer_name, raster_provider)
+                logger.warning("Could not set relative path for raster layer '%s'; using absolute path in QLR. Error: %s", layer_name, e)
+
+    apply_raster_symbology(rlayer, layer_def, precompute_histograms)
 
-    apply_raster_symbology(rlayer, layer_def)
+    if cache_key[1] is not None:
+        _LAYER_CACHE[cache_key] = rlayer
 
-    project.addMapLayer(rlayer, False)
+    _register_layer(project, rlayer, pending_layers)
     return rlayer
 
-def _convert_group_layer(in_folder, group_layer_def, lyrx_json, out_file, project):
-    """
-    Recursively processes a group layer and its children.
+def _child_meta(layer_def):
+    """Returns (type, layer_def, visible, expanded) for a layer tree member."""
+    return (
+        layer_def.get("type"),
+        layer_def,
+        bool(layer_def.get("visibility", True)),
+        bool(layer_def.get("expanded", False)),
+    )
+
+def _convert_group_layer(in_folder, group_layer_def, layer_def_by_uri, out_file, project, precompute_histograms=False):
     """
-    group_name = group_layer_def.get('name', 'group')
-    group_node = QgsLayerTreeGroup(group_name)
+    Processes a group layer and all of its nested children.
 
-    # Set visibility and expanded state for the group itself
-    group_node.setItemVisibilityChecked(bool(group_layer_def.get("visibility", True)))
-    group_node.setExpanded(bool(group_layer_def.get("expanded", False)))
+    The hierarchy is walked breadth-first with an explicit queue rather than by
+    recursion, so deep group trees don't grow the call stack. Children are still
+    attached to their parent group in the order they're listed in the .lyrx.
 
-    # Process child layers
-    for member_uri in group_layer_def.get("layers", []):
-        member_def = next((ld for ld in lyrx_json.get("layerDefinitions", []) if ld.get("uRI") == member_uri), None)
-        if not member_def:
-            continue
+    Args:
+        layer_def_by_uri (dict): Every layer definition in the .lyrx, keyed by its uRI.
+        precompute_histograms (bool, optional): Passed on to each raster member.
+    """
+    def make_group_node(name, visible, expanded):
+        node = QgsLayerTreeGroup(name)
+        # Set visibility and expanded state for the group itself
+        node.setItemVisibilityChecked(visible)
+        node.setExpanded(expanded)
+        return node
+
+    def queue_members(parent_node, group_def, ancestors):
+        # Resolve each member and coerce its tree flags once, as it's queued.
+        # ancestors holds the uRIs of the groups on the path down to parent_node.
+        for member_uri in group_def.get("layers", []):
+            member_def = layer_def_by_uri.get(member_uri)
+            if member_def:
+                pending.append((parent_node, ancestors, member_uri, *_child_meta(member_def)))
+
+    pending = deque()
+    # Layers are registered with the project in one call once the walk is done
+    pending_layers = []
+    root_node = make_group_node(group_layer_def.get('name', 'group'), *_child_meta(group_layer_def)[2:])
+    queue_members(root_node, group_layer_def, frozenset((group_layer_def.get("uRI"),)))
+
+    while pending:
+        group_node, ancestors, member_uri, layer_type, member_def, visible, expanded = pending.popleft()
 
-        layer_type = member_def.get("type")
         if layer_type == "CIMGroupLayer":
-            child_group = _convert_group_layer(in_folder, member_def, lyrx_json, out_file, project)
+            # Guard against a group that (directly or indirectly) contains itself.
+            # A group listed under several parents is still expanded under each one.
+            if member_uri in ancestors:
+                logger.warning("Skipping group '%s': it contains itself", member_def.get('name', member_uri))
+                continue
+
+            child_group = make_group_node(member_def.get('name', 'group'), visible, expanded)
             group_node.addChildNode(child_group)
+            queue_members(child_group, member_def, ancestors | {member_uri})
 
         elif layer_type == "CIMFeatureLayer":
-            child_layer, child_join_layer = _convert_feature_layer(in_folder, member_def, out_file, project)
+            child_layer, child_join_layer = _convert_feature_layer(in_folder, member_def, out_file, project, pending_layers)
             
             _set_metadata(child_layer, member_def)
             _set_scale_visibility(child_layer, member_def)
@@ -647,8 +908,8 @@ def _convert_group_layer(in_folder, group_layer_def, lyrx_json, out_file, projec
             # Add main layer to group
             node = group_node.addLayer(child_layer)
             if node:
-                node.setItemVisibilityChecked(bool(member_def.get("visibility", True)))
-                node.setExpanded(bool(member_def.get("expanded", False)))
+                node.setItemVisibilityChecked(visible)
+                node.setExpanded(expanded)
             
             # Add join layer to group (hidden) so it exports to QLR
             if child_join_layer:
@@ -657,25 +918,93 @@ def _convert_group_layer(in_folder, group_layer_def, lyrx_json, out_file, projec
                 join_node.setExpanded(False)
 
         elif layer_type == 'CIMRasterLayer':
-            child_layer = _convert_raster_layer(in_folder, member_def, out_file, project)
+            child_layer = _convert_raster_layer(in_folder, member_def, out_file, project, pending_layers,
+                                                precompute_histograms)
             _set_metadata(child_layer, member_def)
             _set_scale_visibility(child_layer, member_def)
             _set_layer_transparency(child_layer, member_def)
             node = group_node.addLayer(child_layer)
             if node:
-                node.setItemVisibilityChecked(bool(member_def.get("visibility", True)))
-                node.setExpanded(bool(member_def.get("expanded", False)))
-
-    return group_node
-
-def convert_lyrx(in_lyrx, out_folder=None, qgs=None):
-    """Convert an ArcGIS Pro .lyrx file to a QGIS .qlr file"""
-    print(f"Converting {in_lyrx}...")
-    if not out_folder:
-        out_folder = os.path.dirname(in_lyrx)
-    in_folder = os.path.abspath(os.path.dirname(in_lyrx))
-    out_file = os.path.join(out_folder, os.path.basename(in_lyrx).replace(".lyrx", ".qlr"))
-    
+                node.setItemVisibilityChecked(visible)
+                node.setExpanded(expanded)
+
+    if pending_layers:
+        project.addMapLayers(pending_layers, False)
+    return root_node
+
+def _export_qlr(nodes_to_export, layer_def, out_file):
+    """
+    Exports layer tree nodes to a .qlr file, applying the symbol level post-processing.
+
+    The layer definition is built in memory and written once, rather than exported to
+    a temporary file and read back.
+
+    Args:
+        nodes_to_export (list): The QgsLayerTreeNode objects to write.
+        layer_def (dict): The top-level layer definition from the parsed .lyrx JSON.
+        out_file (str): The path for the output .qlr file.
+    """
+    # Mirror the file-based export: paths are written relative to the .qlr
+    # unless the project is set to store absolute paths.
+    context = QgsReadWriteContext()
+    write_absolute = QgsProject.instance().filePathStorage() == Qgis.FilePathType.Absolute
+    context.setPathResolver(QgsPathResolver("" if write_absolute else os.path.abspath(out_file)))
+
+    doc = QDomDocument("qgis-layer-definition")
+    ok, error_message = QgsLayerDefinition.exportLayerDefinition(doc, nodes_to_export, context)
+    if not ok:
+        raise RuntimeError(f"Failed to export layer definition: {error_message}")
+
+    # Most layers don't use symbol levels; those are serialized straight to
+    # UTF-8 bytes by Qt without an intermediate Python string or XML re-parse
+    if VectorRenderer.uses_symbol_levels(layer_def):
+        final_qlr_content = VectorRenderer.post_process_qlr_for_symbol_levels(doc.toString(2), layer_def)
+        data = final_qlr_content.encode('utf-8')
+    else:
+        data = doc.toByteArray(2).data()
+    # Write beside the target and rename into place so a failed write never
+    # leaves a truncated .qlr behind.
+    tmp_file = out_file + ".tmp"
+    try:
+        with open(tmp_file, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, out_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    logger.debug("Wrote %d bytes to %s", len(data), out_file)
+
+def convert_lyrx(in_lyrx, out_folder=None, qgs=None, precompute_histograms=False):
+    """Convert an ArcGIS Pro .lyrx file to a QGIS .qlr file
+
+    With precompute_histograms, default band histograms are also written to each
+    source raster's .aux.xml sidecar so QGIS doesn't compute them on first load.
+    """
+    logger.info("Converting %s...", in_lyrx)
+    lyrx_path = Path(in_lyrx)
+    in_folder = os.fspath(lyrx_path.parent.resolve())
+    # Swap only the suffix; a folder named *.lyrx must not be rewritten
+    out_file = os.fspath(Path(out_folder or lyrx_path.parent) / (lyrx_path.stem + ".qlr"))
+
+    # Read and validate the .lyrx before paying for QGIS start-up, so bad or
+    # unsupported input fails fast
+    try:
+        lyrx, layer_def_by_uri = _open_lyrx_indexed(in_lyrx)
+    except Exception as e:
+        logger.error("Error converting LYRX: %s", e)
+        raise
+
+    layer_uri = lyrx["layers"][0]
+    layer_def = layer_def_by_uri.get(layer_uri, {})
+    layer_type = layer_def.get("type")
+
+    if layer_type == 'CIMAnnotationLayer':
+        logger.warning("Annotation layers are unsupported")
+        return
+
     manage_qgs = qgs is None
     if manage_qgs:
         qgs = QgsApplication([], False)
@@ -684,18 +1013,11 @@ def convert_lyrx(in_lyrx, out_folder=None, qgs=None):
     project = QgsProject.instance()
 
     try:
-        lyrx = _open_lyrx(in_lyrx)
-        if len(lyrx["layers"]) != 1:
-            raise Exception(f"Unexpected number of layers found: {len(lyrx['layers'])}")
-
-        layer_uri = lyrx["layers"][0]
-        layer_def = next((ld for ld in lyrx.get("layerDefinitions", []) if ld.get("uRI") == layer_uri), {})
-        
-        layer_type = layer_def.get("type")
         nodes_to_export = []
         
         if layer_type == "CIMGroupLayer":
-            root_node = _convert_group_layer(in_folder, layer_def, lyrx, out_file, project)
+            root_node = _convert_group_layer(in_folder, layer_def, layer_def_by_uri, out_file, project,
+                                             precompute_histograms)
             nodes_to_export = [root_node]
 
         elif layer_type == "CIMFeatureLayer":
@@ -705,7 +1027,7 @@ def convert_lyrx(in_lyrx, out_folder=None, qgs=None):
             _set_layer_transparency(out_layer, layer_def)
 
             # Add to root tree manually (since we removed it from _convert_feature_layer)
-            root = QgsProject.instance().layerTreeRoot()
+            root = project.layerTreeRoot()
             node = root.addLayer(out_layer)
             if node:
                 if 'visibility' in layer_def:
@@ -719,12 +1041,13 @@ def convert_lyrx(in_lyrx, out_folder=None, qgs=None):
                 nodes_to_export.append(join_node)
                                 
         elif layer_type == 'CIMRasterLayer':
-            out_layer = _convert_raster_layer(in_folder, layer_def, out_file, project)
+            out_layer = _convert_raster_layer(in_folder, layer_def, out_file, project,
+                                              precompute_histograms=precompute_histograms)
             _set_metadata(out_layer, layer_def)
             _set_scale_visibility(out_layer, layer_def)
             _set_layer_transparency(out_layer, layer_def)
             
-            root = QgsProject.instance().layerTreeRoot()
+            root = project.layerTreeRoot()
             node = root.addLayer(out_layer)
             
             if node:
@@ -732,56 +1055,105 @@ def convert_lyrx(in_lyrx, out_folder=None, qgs=None):
                     node.setItemVisibilityChecked(layer_def['visibility'])
                 nodes_to_export = [node]
 
-        elif layer_type == 'CIMAnnotationLayer':
-            print("Annotation layers are unsupported")
-            return
         else:
             raise Exception(f"Unhandled layer type: {layer_type}")
 
         # Export the QLR including the layer tree node(s)
         if nodes_to_export:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.qlr', delete=False, encoding='utf-8') as temp_file:
-                temp_path = temp_file.name
-            
-            try:
-                ok, error_message = QgsLayerDefinition.exportLayerDefinition(temp_path, nodes_to_export)
-                
-                if not ok:
-                    raise RuntimeError(f"Failed to export layer definition: {error_message}")
-                
-                with open(temp_path, 'r', encoding='utf-8') as f:
-                    qlr_content = f.read()
-                
-                final_qlr_content = VectorRenderer().post_process_qlr_for_symbol_levels(qlr_content, layer_def)
-                
-                with open(out_file, 'w', encoding='utf-8') as f:
-                    f.write(final_qlr_content)
-                
-            finally:
-                # Clean up the temporary file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-
-        print(f"Successfully converted {in_lyrx} to {out_file}")
+            _export_qlr(nodes_to_export, layer_def, out_file)
+
+        logger.info("Successfully converted %s to %s", in_lyrx, out_file)
     except Exception as e:
-        print(f"Error converting LYRX: {e}")
+        logger.error("Error converting LYRX: %s", e)
         raise
     finally:
-        project.clear() # Clear the project instance for the next run
+        _LAYER_CACHE.clear()
+        # Clear the project instance for the next run; nothing to do if no layer was registered
+        if project.count() > 0:
+            project.clear()
         if manage_qgs:
             qgs.exitQgis()
 
 
+# The QgsApplication owned by a convert_lyrx_batch worker process
+_WORKER_QGS = None
+
+
+def _init_batch_worker():
+    """Starts QGIS once in a convert_lyrx_batch worker process."""
+    global _WORKER_QGS
+    _WORKER_QGS = QgsApplication([], False)
+    _WORKER_QGS.initQgis()
+    # Pool workers leave through os._exit under fork/forkserver, which skips
+    # atexit; a multiprocessing finalizer runs on shutdown under every start method
+    Finalize(None, _WORKER_QGS.exitQgis, exitpriority=10)
+
+
+def _convert_in_worker(in_lyrx, out_folder, precompute_histograms=False):
+    """Converts one file in a worker; returns the path if it failed, else None."""
+    try:
+        convert_lyrx(in_lyrx, out_folder, _WORKER_QGS, precompute_histograms)
+    except Exception:
+        return in_lyrx
+    return None
+
+
+def convert_lyrx_batch(paths, out_folder=None, workers=1, precompute_histograms=False):
+    """
+    Converts several .lyrx files while starting QGIS only once per process.
+
+    A failure on one file is logged and the batch moves on to the next. With
+    workers > 1 the files are spread over a process pool, each worker holding
+    its own QgsApplication; QGIS objects can't be shared between threads, so
+    processes are the only way to convert files in parallel.
+
+    Args:
+        paths (Iterable[str]): The .lyrx files to convert.
+        out_folder (str, optional): Where to write the .qlr files. Defaults to each
+            input file's own folder.
+        workers (int, optional): Number of worker processes. Defaults to 1, which
+            converts in this process.
+        precompute_histograms (bool, optional): Passed on to convert_lyrx.
+    Returns:
+        list: The paths that failed to convert.
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+            results = executor.map(_convert_in_worker, paths, repeat(out_folder), repeat(precompute_histograms))
+            return [in_lyrx for in_lyrx in results if in_lyrx]
+
+    failed = []
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    try:
+        for in_lyrx in paths:
+            try:
+                convert_lyrx(in_lyrx, out_folder, qgs, precompute_histograms)
+            except Exception:
+                failed.append(in_lyrx)
+    finally:
+        qgs.exitQgis()
+    return failed
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     output_folder = r""
     in_lyrx = r""
 
-    try:
-        qgs = QgsApplication([], False)
-        qgs.initQgis()
+    if os.path.isdir(in_lyrx):
+        # Convert every .lyrx in the folder under a single QGIS session
+        lyrx_files = sorted(
+            os.path.join(in_lyrx, f) for f in os.listdir(in_lyrx) if f.lower().endswith(".lyrx")
+        )
+        convert_lyrx_batch(lyrx_files, output_folder)
+    else:
+        try:
+            qgs = QgsApplication([], False)
+            qgs.initQgis()
 
-        convert_lyrx(in_lyrx, output_folder, qgs)
-    except Exception as e:
-        print(f"Error converting LYRX: {e}")
-    finally:
-        qgs.exitQgis()
\ No newline at end of file
+            convert_lyrx(in_lyrx, output_folder, qgs)
+        except Exception as e:
+            print(f"Error converting LYRX: {e}")
+        finally:
+            qgs.exitQgis()
\ No newline at end of file
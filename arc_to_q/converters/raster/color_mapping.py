@@ -12,6 +12,14 @@ from qgis.PyQt.QtGui import QColor
 # Assumes the parse_color function is in a utils module at this path
 from arc_to_q.converters.utils import parse_color
 
+def _color_key(color_def):
+    """Returns a hashable key for a CIM color dict, or None if it can't be keyed."""
+    if isinstance(color_def, dict):
+        values = color_def.get('values')
+        if isinstance(values, list):
+            return color_def.get('type'), tuple(values)
+    return None
+
 def create_classified_renderer(raster_layer: QgsRasterLayer, colorizer_def: dict) -> QgsSingleBandPseudoColorRenderer:
     """
     Creates a QGIS classified raster renderer from a CIMRasterClassifyColorizer definition.
@@ -27,22 +35,29 @@ def create_classified_renderer(raster_layer: QgsRasterLayer, colorizer_def: dict
     if not class_breaks:
         return None
 
-    # Create a list of QGIS color ramp items from the CIM class breaks
-    ramp_items = []
-    for c_break in class_breaks:
-        upper_bound = c_break.get('upperBound')
-        label = c_break.get('label', '')
-        color_def = c_break.get('color')
-
-        if upper_bound is None or color_def is None:
-            continue
+    # Classified ramps often repeat the same CIM color; parse each one once.
+    # ColorRampItem copies the QColor, so sharing a parsed instance is safe.
+    color_cache = {}
 
-        qgis_color = parse_color(color_def)
-        if not qgis_color:
-            qgis_color = QColor('black') # Fallback color
+    def color_for(color_def):
+        color_key = _color_key(color_def)
+        qgis_color = color_cache.get(color_key) if color_key is not None else None
+        if qgis_color is None:
+            qgis_color = parse_color(color_def)
+            if not qgis_color:
+                qgis_color = QColor('black') # Fallback color
+            if color_key is not None:
+                color_cache[color_key] = qgis_color
+        return qgis_color
 
-        item = QgsColorRampShader.ColorRampItem(upper_bound, qgis_color, label)
-        ramp_items.append(item)
+    # Create a list of QGIS color ramp items from the CIM class breaks,
+    # skipping any break without an upper bound or color
+    RampItem = QgsColorRampShader.ColorRampItem
+    ramp_items = [
+        RampItem(c_break['upperBound'], color_for(c_break['color']), c_break.get('label', ''))
+        for c_break in class_breaks
+        if c_break.get('upperBound') is not None and c_break.get('color') is not None
+    ]
 
     # A discrete ramp ensures each value range gets a single color, like a classified map.
     color_ramp_shader = QgsColorRampShader()
@@ -1,24 +1,101 @@
 """
 Raster renderer and processing module for ArcGIS to QGIS conversion.
 """
+import logging
 import os
+from contextlib import contextmanager
 from pathlib import Path
 from qgis.core import (
+    QgsProviderRegistry,
     QgsRasterLayer, 
     QgsRasterDataProvider,
     QgsRasterPipe
 )
 from arc_to_q.converters.raster.color_mapping import create_classified_renderer
-from arc_to_q.converters.raster.resampling import get_resampling_method
+from arc_to_q.converters.raster.resampling import get_zoom_in_resampling, get_zoom_out_resampling
 from arc_to_q.converters.raster.stretch_renderer import create_stretched_renderer
 
+logger = logging.getLogger(__name__)
 
-def apply_raster_symbology(qgis_layer: QgsRasterLayer, layer_def: dict):
+# Bucket count for histograms precomputed into a raster's PAM (.aux.xml) sidecar
+_DEFAULT_HISTOGRAM_BUCKETS = 1000
+
+
+def precompute_default_histograms(qgis_layer: QgsRasterLayer):
+    """Store a default histogram for each band in the raster's PAM sidecar.
+
+    Without one, QGIS may compute a very large histogram the first time the layer is
+    styled. Bands that already have a default histogram are left alone. Only local
+    GDAL sources are handled; failures are logged and otherwise ignored.
+
+    Args:
+        qgis_layer (QgsRasterLayer): The raster layer whose source should be updated.
+    """
+    if qgis_layer.providerType() != "gdal":
+        return
+
+    path = QgsProviderRegistry.instance().decodeUri("gdal", qgis_layer.source()).get("path")
+    if not path or not os.path.isfile(path):
+        return
+
+    # Only needed for this opt-in step, so GDAL's Python bindings load on first use
+    from osgeo import gdal
+
+    try:
+        with _gdal_exceptions(gdal):
+            # PAM metadata is written to the .aux.xml on close, even for read-only datasets
+            dataset = gdal.Open(path, gdal.GA_ReadOnly)
+            band = None
+            try:
+                for band_no in range(1, dataset.RasterCount + 1):
+                    band = dataset.GetRasterBand(band_no)
+                    if band.GetDefaultHistogram(force=False):
+                        continue
+                    min_val, max_val = band.ComputeRasterMinMax(False)
+                    hist = band.GetHistogram(min=min_val, max=max_val, buckets=_DEFAULT_HISTOGRAM_BUCKETS,
+                                             include_out_of_range=0, approx_ok=0)
+                    band.SetDefaultHistogram(min_val, max_val, hist)
+            finally:
+                # Close now so the sidecar is written even if a band failed; bands
+                # hold a reference to their dataset, so drop them first
+                band = None
+                if hasattr(dataset, "Close"):
+                    dataset.Close()
+                dataset = None
+    except Exception as e:
+        logger.warning("Could not precompute histograms for '%s': %s", path, e)
+
+
+@contextmanager
+def _gdal_exceptions(gdal):
+    """Raise GDAL errors as exceptions only inside the block.
+
+    The process-wide error mode is shared with QGIS and other plugins, so the
+    previous mode is always restored. GDAL < 3.7 has no ExceptionMgr, so the mode
+    is switched and restored by hand there.
+    """
+    if hasattr(gdal, "ExceptionMgr"):
+        with gdal.ExceptionMgr(useExceptions=True):
+            yield
+        return
+
+    previous = gdal.GetUseExceptions()
+    gdal.UseExceptions()
+    try:
+        yield
+    finally:
+        if not previous:
+            gdal.DontUseExceptions()
+
+
+def apply_raster_symbology(qgis_layer: QgsRasterLayer, layer_def: dict, precompute_histograms: bool = False):
     """Apply symbology and rendering settings to a raster layer.
     
     Args:
         qgis_layer (QgsRasterLayer): The QGIS raster layer to modify.
         layer_def (dict): The layer definition from the LYRX file.
+        precompute_histograms (bool, optional): Also store default histograms in the
+            source raster's PAM sidecar (see precompute_default_histograms).
     """
     colorizer_def = layer_def.get('colorizer', {})
     if not colorizer_def:
@@ -37,25 +114,30 @@ def apply_raster_symbology(qgis_layer: QgsRasterLayer, layer_def: dict):
 
     if renderer:
         qgis_layer.setRenderer(renderer)
+
+    if precompute_histograms:
+        precompute_default_histograms(qgis_layer)
     
     # 2. Configure Resampling (The Core Fix)
     # ArcGIS "Bilinear" on classified data means "Interpolate Values, then Classify".
     # QGIS default is "Classify, then Interpolate Colors" (which blurs).
     # Solution: Force the PROVIDER to interpolate values first.
     
-    resampling_method = get_resampling_method(colorizer_def)
+    zoom_in_method = get_zoom_in_resampling(colorizer_def)
+    zoom_out_method = get_zoom_out_resampling(colorizer_def)
     
     # Check if the requested method is a "smoothing" type (Bilinear, Cubic)
-    is_smooth = resampling_method in (
+    is_smooth = zoom_in_method in (
         QgsRasterDataProvider.ResamplingMethod.Bilinear,
         QgsRasterDataProvider.ResamplingMethod.Cubic
     )
 
     data_provider = qgis_layer.dataProvider()
     if data_provider:
-        # Always set the method on the provider
-        data_provider.setZoomedInResamplingMethod(resampling_method)
-        data_provider.setZoomedOutResamplingMethod(resampling_method)
+        # Always set the methods on the provider; each direction only accepts
+        # its own set of methods
+        data_provider.setZoomedInResamplingMethod(zoom_in_method)
+        data_provider.setZoomedOutResamplingMethod(zoom_out_method)
         
         # Enable Provider Resampling if we need smoothing. 
         # This forces GDAL to calculate intermediate values (e.g. 10.5) which the 
@@ -84,9 +166,10 @@ def apply_raster_symbology(qgis_layer: QgsRasterLayer, layer_def: dict):
 
     # 4. Force Pipeline Order
     # Explicitly tell the pipe to prefer the Provider stage if possible
-    if qgis_layer.pipe():
-        if is_smooth and is_classified:
-             qgis_layer.pipe().setResamplingStage(QgsRasterPipe.Provider)
+    if is_smooth and is_classified:
+        pipe = qgis_layer.pipe()
+        if pipe:
+            pipe.setResamplingStage(QgsRasterPipe.Provider)
 
 
 def switch_to_relative_path(qgis_layer, rel_uri):
@@ -108,5 +191,5 @@ def switch_to_relative_path(qgis_layer, rel_uri):
         if qgis_layer.error().summary():
             error_msg += f"\nError: {qgis_layer.error().summary()}"
         
-        print(error_msg)
+        logger.error(error_msg)
         raise RuntimeError(f"Raster layer became invalid: {layer_name}")
\ No newline at end of file
@@ -12,6 +12,18 @@ RESAMPLING_MAP = {
     'Majority': QgsRasterDataProvider.ResamplingMethod.Average, 
     'MajorityVote': QgsRasterDataProvider.ResamplingMethod.Average
 }
+_DEFAULT_RESAMPLING = QgsRasterDataProvider.ResamplingMethod.Nearest
+# Methods QGIS accepts when drawing above / below native resolution; anything
+# else falls back to Nearest (an unsupported zoomed-out method can crash QGIS)
+_ZOOM_IN_METHODS = frozenset((
+    QgsRasterDataProvider.ResamplingMethod.Nearest,
+    QgsRasterDataProvider.ResamplingMethod.Bilinear,
+    QgsRasterDataProvider.ResamplingMethod.Cubic,
+))
+_ZOOM_OUT_METHODS = frozenset((
+    QgsRasterDataProvider.ResamplingMethod.Nearest,
+    QgsRasterDataProvider.ResamplingMethod.Average,
+))
 def get_resampling_method(colorizer_def: dict) -> QgsRasterDataProvider.ResamplingMethod:
     """
     Parses the colorizer definition to get the QGIS resampling method enum.
@@ -20,8 +32,31 @@ def get_resampling_method(colorizer_def: dict) -> QgsRasterDataProvider.Resampli
     Returns:
         The corresponding QgsRasterDataProvider.ResamplingMethod enum value.
     """
-    # Get the resampling type string from the JSON, defaulting to 'NearestNeighbor'.
-    resampling_type_str = colorizer_def.get('resamplingType', 'NearestNeighbor')
+    # Unknown or missing types fall back to Nearest, ArcGIS's default.
+    return RESAMPLING_MAP.get(colorizer_def.get('resamplingType'), _DEFAULT_RESAMPLING)
 
-    # Return the QGIS equivalent enum, or Nearest as a fallback.
-    return RESAMPLING_MAP.get(resampling_type_str, QgsRasterDataProvider.ResamplingMethod.Nearest)
\ No newline at end of file
+
+def get_zoom_in_resampling(colorizer_def: dict) -> QgsRasterDataProvider.ResamplingMethod:
+    """
+    Gets the resampling method to use when zoomed in past native resolution.
+    Args:
+        colorizer_def: The 'colorizer' dictionary from the LYRX file.
+    Returns:
+        The ResamplingMethod for setZoomedInResamplingMethod.
+    """
+    method = get_resampling_method(colorizer_def)
+    return method if method in _ZOOM_IN_METHODS else _DEFAULT_RESAMPLING
+
+
+def get_zoom_out_resampling(colorizer_def: dict) -> QgsRasterDataProvider.ResamplingMethod:
+    """
+    Gets the resampling method to use when zoomed out past native resolution.
+    Uses 'zoomOutResamplingType' if present, otherwise 'resamplingType'.
+    Args:
+        colorizer_def: The 'colorizer' dictionary from the LYRX file.
+    Returns:
+        The ResamplingMethod for setZoomedOutResamplingMethod.
+    """
+    resampling_type = colorizer_def.get('zoomOutResamplingType') or colorizer_def.get('resamplingType')
+    method = RESAMPLING_MAP.get(resampling_type, _DEFAULT_RESAMPLING)
+    return method if method in _ZOOM_OUT_METHODS else _DEFAULT_RESAMPLING
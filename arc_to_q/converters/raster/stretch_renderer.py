@@ -2,27 +2,156 @@
 Creates QGIS stretched raster renderers from ArcGIS CIM definitions.
 """
 import logging
+import os
 from typing import Dict, Any, List
+
+import numpy as np
 from qgis.core import (
     QgsRasterLayer, 
     QgsSingleBandPseudoColorRenderer, 
     QgsColorRampShader,
     QgsRasterShader, 
     QgsRasterBandStats,
+    QgsProviderRegistry,
 )
 from qgis.PyQt.QtGui import QColor
 from arc_to_q.converters.utils import extract_colors_from_ramp
 
 logger = logging.getLogger(__name__)
 
+# Band statistics keyed by (data source URI, file mtime and size, band number, statistics
+# mask). Computing them can mean reading the whole raster, and the same source is often
+# styled by several .lyrx files; a raster rewritten in place gets a new key. The oldest
+# entry is dropped once _STATS_CACHE_SIZE is reached.
+_STATS_CACHE: Dict[tuple, QgsRasterBandStats] = {}
+_STATS_CACHE_SIZE = 256
+
+# Every stretch needs the band min/max; only a standard deviation stretch needs more
+_MIN_MAX_STATS = QgsRasterBandStats.Min | QgsRasterBandStats.Max
+_STD_DEV_STATS = _MIN_MAX_STATS | QgsRasterBandStats.Mean | QgsRasterBandStats.StdDev
+
+
+def _band_stats(raster_layer: QgsRasterLayer, stats_mask=_MIN_MAX_STATS, band: int = 1,
+                refresh: bool = False) -> QgsRasterBandStats:
+    """Returns the requested band statistics for a raster layer, computing them once per data source."""
+    provider = raster_layer.dataProvider()
+    uri = provider.dataSourceUri()
+    key = (uri, _source_signature(raster_layer.providerType(), uri), band, stats_mask)
+    stats = None if refresh else _STATS_CACHE.get(key)
+    if stats is None:
+        stats = provider.bandStatistics(band, stats_mask)
+        if len(_STATS_CACHE) >= _STATS_CACHE_SIZE:
+            del _STATS_CACHE[next(iter(_STATS_CACHE))]
+        _STATS_CACHE[key] = stats
+    return stats
+
+
+def _source_signature(provider_type: str, uri: str):
+    """Returns (mtime_ns, size) of a file-based raster source, or None if it has no local file."""
+    path = QgsProviderRegistry.instance().decodeUri(provider_type, uri).get("path")
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# Largest color error, in 0-255 channel levels, tolerated when thinning the
+# histogram equalize ramp
+_RAMP_COLOR_TOLERANCE = 1.0
+
+
+def _ramp_knees(values: np.ndarray, rgb: np.ndarray, tolerance: float = _RAMP_COLOR_TOLERANCE) -> List[int]:
+    """
+    Douglas-Peucker simplification of a piecewise-linear (value, color) ramp.
+
+    Returns the sorted indices of the entries to keep: interpolating linearly
+    between them stays within ``tolerance`` channel levels of every dropped entry.
+    """
+    last = len(values) - 1
+    keep = {0, last}
+    stack = [(0, last)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        span = values[end] - values[start]
+        t = (values[start + 1:end] - values[start]) / span if span > 0 else np.zeros(end - start - 1)
+        line = rgb[start] + t[:, None] * (rgb[end] - rgb[start])
+        error = np.abs(rgb[start + 1:end] - line).max(axis=1)
+        worst = int(error.argmax())
+        if error[worst] > tolerance:
+            split = start + 1 + worst
+            keep.add(split)
+            stack.append((start, split))
+            stack.append((split, end))
+    return sorted(keep)
+
+
+def _histogram_equalize_ramp(base_rgb: np.ndarray, histogram, vmin: float, vmax: float,
+                             exponent: float = 1.0, num_palette_entries: int = 256):
+    """
+    Builds the simulated 'Histogram Equalize' ramp.
+
+    Returns (values, palette_rgb, keep): the full ramp of num_palette_entries values
+    and integer RGB colors, with the first and last values pinned to vmin/vmax, and
+    the indices _ramp_knees keeps from it.
+    """
+    # 1. Generate the color palette from the ArcGIS multipart color ramp: find the
+    # ramp segment each entry falls into and its progress within that segment
+    num_segments = len(base_rgb) - 1
+    segment_float = np.arange(num_palette_entries) / (num_palette_entries - 1) * num_segments
+    segment_index = np.minimum(segment_float.astype(np.intp), num_segments - 1)
+    p_segment = (segment_float - segment_index)[:, None]
+    palette_rgb = (base_rgb[segment_index] * (1 - p_segment)
+                   + base_rgb[segment_index + 1] * p_segment).astype(np.intp)
+
+    # 2. Calculate the Cumulative Distribution Function (CDF) from the histogram
+    hist = np.asarray(histogram, dtype=np.float64)
+    total_pixels = hist[hist > 0].sum()
+    num_bins = len(hist)
+    cdf = np.cumsum(hist) / total_pixels if total_pixels > 0 else np.zeros(num_bins)
+
+    # 3. Apply gamma correction to each palette entry's percentile, then find the
+    # first bin whose CDF reaches it (the last bin if none does)
+    data_range = vmax - vmin
+    epsilon = (data_range / num_palette_entries) * 1e-6 if data_range > 0 else 1e-9
+    adjusted_percentiles = (np.arange(num_palette_entries) / (num_palette_entries - 1)) ** exponent
+    bin_index = np.minimum(np.searchsorted(cdf, adjusted_percentiles, side='left'), num_bins - 1)
+    values = vmin + (bin_index / max(num_bins - 1, 1)) * data_range
+
+    # Ensure each value is strictly greater than the last to prevent hard breaks:
+    # bumping repeats by epsilon is a running max once the i * epsilon ramp is removed
+    steps = np.arange(num_palette_entries) * epsilon
+    values = np.maximum.accumulate(values - steps) + steps
+
+    # Pin the ends to the exact ArcGIS min/max before thinning, so the tolerance
+    # is checked against the ramp the shader actually draws
+    values[0] = vmin
+    values[-1] = vmax
+
+    # The shader interpolates between items anyway, so only keep the entries
+    # where the value-to-color curve bends; typically a few dozen instead of 256
+    keep = _ramp_knees(values, palette_rgb.astype(np.float64))
+    return values, palette_rgb, keep
+
+
 def create_stretched_renderer(raster_layer: QgsRasterLayer, colorizer_def: Dict[str, Any]) -> QgsSingleBandPseudoColorRenderer:
     """
     Creates a QGIS single-band pseudocolor renderer that correctly applies all
     supported stretch methods by separating the visual rendering values from the
     legend's physical unit labels when necessary.
     """
-    stats = raster_layer.dataProvider().bandStatistics(1, QgsRasterBandStats.All)
+    # The ramp colors feed both the histogram equalize palette and the default ramp items;
+    # without any there is nothing to render, so skip the band statistics too
+    colors = extract_colors_from_ramp(colorizer_def.get('colorRamp', {}))
+    if not colors:
+        return None
+    if colorizer_def.get("invert", False):
+        colors.reverse()
+
     stretch_type = colorizer_def.get('stretchType', 'None')
+    stats = _band_stats(raster_layer, _STD_DEV_STATS if stretch_type == 'StandardDeviations' else _MIN_MAX_STATS)
 
     # Get the precise min/max values and labels stored by ArcGIS for the legend
     arcgis_min_label_val = colorizer_def.get('customStretchMin', stats.minimumValue)
@@ -42,8 +171,9 @@ def create_stretched_renderer(raster_layer: QgsRasterLayer, colorizer_def: Dict[
         visual_min = mean - (n * std_dev)
         visual_max = mean + (n * std_dev)
         
-        print(f"[INFO] For layer '{raster_layer.name()}': Applied a '{stretch_type}' stretch for visual contrast.")
-        print(f"       The legend has been set to display the original data units: '{low_label}' to '{high_label}'.")
+        logger.info("For layer '%s': Applied a '%s' stretch for visual contrast. "
+                    "The legend has been set to display the original data units: '%s' to '%s'.",
+                    raster_layer.name(), stretch_type, low_label, high_label)
 
     elif stretch_type == 'PercentMinimumMaximum':
         # Use the histogram pre-calculated by ArcGIS and stored in the LYRX file
@@ -55,29 +185,33 @@ def create_stretched_renderer(raster_layer: QgsRasterLayer, colorizer_def: Dict[
             visual_min = stats.minimumValue
             visual_max = stats.maximumValue
         else:
-            total_pixels = sum(histogram)
             min_percent = colorizer_def.get('minPercent', 0.0) / 100.0
             max_percent = colorizer_def.get('maxPercent', 0.0) / 100.0
-            
-            # Find the value at the lower percentage cutoff
-            count = 0
-            for i, h_count in enumerate(histogram):
-                count += h_count
-                if count / total_pixels >= min_percent:
-                    # Interpolate the value based on the histogram bin
-                    visual_min = stats.minimumValue + (i / len(histogram)) * (stats.maximumValue - stats.minimumValue)
-                    break
-            
-            # Find the value at the upper percentage cutoff
-            count = 0
-            for i, h_count in reversed(list(enumerate(histogram))):
-                count += h_count
-                if count / total_pixels >= max_percent:
-                    visual_max = stats.minimumValue + (i / len(histogram)) * (stats.maximumValue - stats.minimumValue)
-                    break
-            
-            print(f"[INFO] For layer '{raster_layer.name()}': Applied a 'Percent Clip' stretch.")
-            print(f"       The legend does not display the original data units: '{low_label}' to '{high_label} but they can be found in Labels'.")
+            num_bins = len(histogram)
+            data_range = stats.maximumValue - stats.minimumValue
+
+            cdf = np.cumsum(np.asarray(histogram, dtype=np.float64))
+            total_pixels = cdf[-1]
+
+            if total_pixels > 0:
+                # Lower cutoff: the first bin where the running count reaches min_percent
+                low_index = int(np.searchsorted(cdf, min_percent * total_pixels, side='left'))
+                # Upper cutoff: the last bin whose count from the top reaches max_percent,
+                # i.e. one past the last bin where the count from the bottom stays within the rest
+                high_index = int(np.searchsorted(cdf, (1.0 - max_percent) * total_pixels, side='right'))
+                high_index = min(high_index, num_bins - 1)
+
+                # Interpolate the values based on the histogram bins
+                visual_min = stats.minimumValue + (low_index / num_bins) * data_range
+                visual_max = stats.minimumValue + (high_index / num_bins) * data_range
+            else:
+                logger.warning("PercentMinimumMaximum histogram in LYRX is empty. Falling back to Min/Max.")
+                visual_min = stats.minimumValue
+                visual_max = stats.maximumValue
+
+            logger.info("For layer '%s': Applied a 'Percent Clip' stretch. "
+                        "The legend does not display the original data units: '%s' to '%s' but they can be found in Labels.",
+                        raster_layer.name(), low_label, high_label)
     
     elif stretch_type == 'HistogramEqualize':
         stretch_stats = colorizer_def.get('stretchStats', {})
@@ -88,100 +222,39 @@ def create_stretched_renderer(raster_layer: QgsRasterLayer, colorizer_def: Dict[
             visual_min = arcgis_min_label_val
             visual_max = arcgis_max_label_val
         else:
-            print(f"[INFO] For layer '{raster_layer.name()}': Applying simulated 'Histogram Equalize' stretch.")
-            print(f"       The legend does not display the original data units: '{low_label}' to '{high_label} but they can be found in Labels'.")
+            logger.info("For layer '%s': Applying simulated 'Histogram Equalize' stretch. "
+                        "The legend does not display the original data units: '%s' to '%s' but they can be found in Labels.",
+                        raster_layer.name(), low_label, high_label)
 
             # 1. Generate a 256-step color palette from the ArcGIS multipart color ramp
-            arc_color_ramp = colorizer_def.get('colorRamp', {})
-            base_colors = extract_colors_from_ramp(arc_color_ramp)
-            if not base_colors or len(base_colors) < 2:
+            base_colors = colors
+            if len(base_colors) < 2:
                 logger.error("Could not extract a valid multipart color ramp. Aborting.")
                 return None
 
-            if colorizer_def.get("invert", False):
-                base_colors.reverse()
-
-            full_palette: List[QColor] = []
-            num_palette_entries = 256
-            num_segments = len(base_colors) - 1
-
-            for i in range(num_palette_entries):
-                # Determine which segment the current palette entry falls into
-                p = i / (num_palette_entries - 1)
-                segment_float = p * num_segments
-                segment_index = int(segment_float)
-                if segment_index >= num_segments:
-                    segment_index = num_segments - 1
-
-                # Determine the progress within that specific segment (0.0 to 1.0)
-                p_segment = segment_float - segment_index
-
-                start_color = base_colors[segment_index]
-                end_color = base_colors[segment_index + 1]
-
-                # Interpolate the color for the current entry
-                r = int(start_color.red() * (1 - p_segment) + end_color.red() * p_segment)
-                g = int(start_color.green() * (1 - p_segment) + end_color.green() * p_segment)
-                b = int(start_color.blue() * (1 - p_segment) + end_color.blue() * p_segment)
-                full_palette.append(QColor(r, g, b))
-            
-            # 2. Calculate the Cumulative Distribution Function (CDF) from the histogram
-            total_pixels = sum(h for h in histogram if h > 0)
-            cdf = [0.0] * len(histogram)
-            cumulative_sum = 0
-            if total_pixels > 0:
-                for i, h_count in enumerate(histogram):
-                    cumulative_sum += h_count
-                    cdf[i] = cumulative_sum / total_pixels
-
-            # 3. Create discrete color ramp items, applying gamma and ensuring values are monotonically increasing
-            data_range = arcgis_max_label_val - arcgis_min_label_val
-            last_value = -float('inf')
-            epsilon = (data_range / num_palette_entries) * 1e-6 if data_range > 0 else 1e-9
-
             # Get gamma value, defaulting to 1.0 (no change) if not present
             exponent = 1.0
             if colorizer_def.get("useGammaStretch", False):
                 exponent = colorizer_def.get("gammaValue", 1.0)
 
-            for i in range(num_palette_entries):
-                target_percentile = i / (num_palette_entries - 1)
-                
-                # Apply gamma correction to the percentile
-                adjusted_percentile = target_percentile ** exponent
-                
-                bin_index = next((j for j, p in enumerate(cdf) if p >= adjusted_percentile), len(cdf) - 1)
-                value = arcgis_min_label_val + (bin_index / (len(histogram) - 1)) * data_range
-
-                # Ensure value is strictly greater than the last to prevent hard breaks
-                if value <= last_value:
-                    value = last_value + epsilon
-                last_value = value
-
-                color_ramp_items.append(QgsColorRampShader.ColorRampItem(value, full_palette[i]))
-            
-            # Clamp first and last items to exact min/max and set labels
-            if color_ramp_items:
-                # Get colors from the generated items before replacing them
-                first_color = color_ramp_items[0].color
-                last_color = color_ramp_items[-1].color
-                
-                # Replace the first and last items with new, corrected ones
-                color_ramp_items[0] = QgsColorRampShader.ColorRampItem(
-                    arcgis_min_label_val,
-                    first_color,
-                    low_label
-                )
-                color_ramp_items[-1] = QgsColorRampShader.ColorRampItem(
-                    arcgis_max_label_val,
-                    last_color,
-                    high_label
-                )
+            base_rgb = np.array([(c.red(), c.green(), c.blue()) for c in base_colors], dtype=np.float64)
+            values, palette_rgb, keep = _histogram_equalize_ramp(
+                base_rgb, histogram, arcgis_min_label_val, arcgis_max_label_val, exponent
+            )
+
+            # Only the knee entries become items; the first and last carry the legend labels
+            value_list = values.tolist()
+            rgb_list = palette_rgb.tolist()
+            last = len(value_list) - 1
+            labels = {0: low_label, last: high_label}
+            color_ramp_items = [
+                QgsColorRampShader.ColorRampItem(value_list[i], QColor(*rgb_list[i]), labels.get(i, ''))
+                for i in keep
+            ]
 
             visual_min = arcgis_min_label_val
             visual_max = arcgis_max_label_val
             use_pregenerated_ramp_items = True
-            use_pregenerated_ramp_items = True
 
 
     elif stretch_type in ['Custom', 'None']:
@@ -189,36 +262,19 @@ def create_stretched_renderer(raster_layer: QgsRasterLayer, colorizer_def: Dict[
         visual_min = arcgis_min_label_val
         visual_max = arcgis_max_label_val
         
-        print(f"[INFO] For layer '{raster_layer.name()}': Applied a '{stretch_type}' stretch.")
-        print(f"       The legend does not display the original data units: '{low_label}' to '{high_label} but they can be found in Labels'.")
+        logger.info("For layer '%s': Applied a '%s' stretch. "
+                    "The legend does not display the original data units: '%s' to '%s' but they can be found in Labels.",
+                    raster_layer.name(), stretch_type, low_label, high_label)
 
     else: # This covers 'MinimumMaximum'
         visual_min = stats.minimumValue
         visual_max = stats.maximumValue
 
-    arc_color_ramp = colorizer_def.get('colorRamp', {})
-    colors = extract_colors_from_ramp(arc_color_ramp)
-    
-    if not colors:
-        return None
-    
-    if colorizer_def.get("invert", False):
-        colors.reverse()
-    
     shader = QgsColorRampShader(minimumValue=visual_min, maximumValue=visual_max)
     shader.setColorRampType(QgsColorRampShader.Interpolated)
     shader.setClassificationMode(QgsColorRampShader.Continuous)
 
     if not use_pregenerated_ramp_items:
-        arc_color_ramp = colorizer_def.get('colorRamp', {})
-        colors = extract_colors_from_ramp(arc_color_ramp)
-        
-        if not colors:
-            return None
-        
-        if colorizer_def.get("invert", False):
-            colors.reverse()
-        
         num_colors = len(colors)
         if num_colors > 0:
             color_ramp_items.append(QgsColorRampShader.ColorRampItem(visual_min, colors[0], low_label))
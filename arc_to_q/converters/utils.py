@@ -1,6 +1,8 @@
 from colorsys import hsv_to_rgb
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
 from qgis.PyQt.QtGui import QColor
 
 def parse_color(cim_color: Optional[Dict[str, Any]]) -> QColor:
@@ -11,43 +13,33 @@ def parse_color(cim_color: Optional[Dict[str, Any]]) -> QColor:
     if not cim_color:
         return QColor(0, 0, 0, 255)
 
+    # Exact type checks first (JSON only yields plain dicts and lists); subclasses
+    # are normalized by the isinstance fallback below
+    color_type = type(cim_color)
+    if color_type is not dict and color_type is not list and color_type is not tuple:
+        if isinstance(cim_color, dict):
+            cim_color = dict(cim_color)
+        elif isinstance(cim_color, (list, tuple)):
+            cim_color = tuple(cim_color)
+        color_type = type(cim_color)
+
     # --- ArcGIS CIM dict form ---
-    if isinstance(cim_color, dict) and "values" in cim_color:
-        vals = cim_color["values"]
+    if color_type is dict and "values" in cim_color:
         ctype = cim_color.get("type", "")
-
-        if ctype == "CIMRGBColor" and len(vals) >= 3:
-            r, g, b = vals[0], vals[1], vals[2]
-            a = vals[3] if len(vals) > 3 else 100
-            return QColor(int(r), int(g), int(b), int(a * 2.55))
-
-        elif ctype == "CIMHSVColor" and len(vals) >= 3:
-            h, s, v = vals[0], vals[1], vals[2]
-            a = vals[3] if len(vals) > 3 else 100
-            # Convert HSV (degrees, %, %, %) to RGB 0–255
-            r, g, b = hsv_to_rgb(h / 360.0, s / 100.0, v / 100.0)
-            return QColor(int(r * 255), int(g * 255), int(b * 255), int(a * 2.55))
-
-        elif ctype == "CIMCMYKColor" and len(vals) >= 4:
-            # Simple CMYK to RGB conversion
-            c, m, y, k = vals[0], vals[1], vals[2], vals[3]
-            a = vals[4] if len(vals) > 4 else 100
-            r = 255 * (1 - c / 100) * (1 - k / 100)
-            g = 255 * (1 - m / 100) * (1 - k / 100)
-            b = 255 * (1 - y / 100) * (1 - k / 100)
-            return QColor(int(r), int(g), int(b), int(a * 2.55))
-
-        elif ctype == "CIMLABColor" and len(vals) >= 3:
-            L, a_val, b_val = vals[0], vals[1], vals[2]
-            alpha = vals[3] if len(vals) > 3 else 100
-            return _convert_lab_to_rgb(L, a_val, b_val, alpha)
-
-        # Fallback: treat as RGB list if type is unknown but values exist
-        elif len(vals) >= 3:
-            return QColor(int(vals[0]), int(vals[1]), int(vals[2]))
+        vals = tuple(cim_color["values"])
+        try:
+            hash(vals)
+        except TypeError:
+            # Unhashable values; parse without the cache
+            rgba = _cim_rgba.__wrapped__(ctype, vals)
+        else:
+            rgba = _cim_rgba(ctype, vals)
+        if rgba is not None:
+            # A fresh QColor per call, since callers may modify it
+            return QColor(*rgba)
 
     # --- Already a list/tuple ---
-    elif isinstance(cim_color, (list, tuple)):
+    elif color_type is list or color_type is tuple:
         if len(cim_color) >= 3:
             r, g, b = int(cim_color[0]), int(cim_color[1]), int(cim_color[2])
             a = int(cim_color[3]) if len(cim_color) > 3 else 255
@@ -62,53 +54,130 @@ def parse_color(cim_color: Optional[Dict[str, Any]]) -> QColor:
     return QColor(0, 0, 0, 255)
 
 
+@lru_cache(maxsize=4096)
+def _cim_rgba(ctype: str, vals) -> Optional[Tuple[int, int, int, int]]:
+    """Convert CIM color type and values to an RGBA tuple, or None if unknown.
+
+    Cached because renderers repeat the same fill and stroke colors across
+    many classes.
+    """
+    # ArcGIS alpha is 0-100; scale with integer math so 100 maps to 255
+    # exactly (100 * 2.55 truncates to 254).
+    # Fast path: CIM colors almost always carry exactly four values.
+    if len(vals) == 4:
+        if ctype == "CIMRGBColor":
+            r, g, b, a = vals
+            return int(r), int(g), int(b), int(a * 255) // 100
+        if ctype == "CIMLABColor":
+            return _lab_to_rgba(*vals)
+
+    if ctype == "CIMRGBColor" and len(vals) >= 3:
+        r, g, b = vals[0], vals[1], vals[2]
+        a = vals[3] if len(vals) > 3 else 100
+        return int(r), int(g), int(b), int(a * 255) // 100
+
+    elif ctype == "CIMHSVColor" and len(vals) >= 3:
+        h, s, v = vals[0], vals[1], vals[2]
+        a = vals[3] if len(vals) > 3 else 100
+        # Convert HSV (degrees, %, %, %) to RGB 0–255
+        r, g, b = hsv_to_rgb(h / 360.0, s / 100.0, v / 100.0)
+        return int(r * 255), int(g * 255), int(b * 255), int(a * 255) // 100
+
+    elif ctype == "CIMCMYKColor" and len(vals) >= 4:
+        # Simple CMYK to RGB conversion
+        c, m, y, k = vals[0], vals[1], vals[2], vals[3]
+        a = vals[4] if len(vals) > 4 else 100
+        r = 255 * (1 - c / 100) * (1 - k / 100)
+        g = 255 * (1 - m / 100) * (1 - k / 100)
+        b = 255 * (1 - y / 100) * (1 - k / 100)
+        return int(r), int(g), int(b), int(a * 255) // 100
+
+    elif ctype == "CIMLABColor" and len(vals) >= 3:
+        L, a_val, b_val = vals[0], vals[1], vals[2]
+        alpha = vals[3] if len(vals) > 3 else 100
+        return _lab_to_rgba(L, a_val, b_val, alpha)
+
+    # Fallback: treat as RGB list if type is unknown but values exist
+    elif len(vals) >= 3:
+        return int(vals[0]), int(vals[1]), int(vals[2]), 255
+
+    return None
+
+
+# D65 reference white (scaled to Y = 1) and the linear XYZ -> sRGB matrix
+_LAB_WHITE = np.array([0.95047, 1.00000, 1.08883])
+_XYZ_TO_SRGB = np.array([
+    [3.2406, -1.5372, -0.4986],
+    [-0.9689, 1.8758, 0.0415],
+    [0.0557, -0.2040, 1.0570],
+])
+
+
+def _lab_to_rgb_vec(L, a, b, alpha) -> np.ndarray:
+    """Convert arrays of LAB colors to an (n, 4) uint8 array of RGBA."""
+    L = np.asarray(L, dtype=float)
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+
+    # LAB to XYZ conversion (D65 illuminant)
+    fy = (L + 16.0) / 116.0
+    f = np.stack([fy + a / 500.0, fy, fy - b / 200.0], axis=-1)
+    delta = 6.0 / 29.0
+    f = np.where(f > delta, f ** 3, 3 * delta ** 2 * (f - 4.0 / 29.0))
+    xyz = f * _LAB_WHITE
+
+    # XYZ to RGB conversion (sRGB color space)
+    rgb = np.einsum('ij,nj->ni', _XYZ_TO_SRGB, xyz.reshape(-1, 3))
+    rgb = np.where(
+        rgb > 0.0031308,
+        1.055 * np.power(np.maximum(rgb, 0.0), 1.0 / 2.4) - 0.055,
+        12.92 * rgb,
+    )
+
+    rgba = np.empty((rgb.shape[0], 4), dtype=np.uint8)
+    rgba[:, :3] = np.clip(rgb * 255, 0, 255)
+    rgba[:, 3] = np.clip(np.trunc(alpha.reshape(-1) * 255) // 100, 0, 255)
+    return rgba
+
+
+def _lab_to_rgba(L, a, b, alpha) -> Tuple[int, int, int, int]:
+    """Convert one LAB color to an RGBA tuple, opaque black on failure."""
+    try:
+        return tuple(_lab_to_rgb_vec(L, a, b, alpha)[0].tolist())
+    except Exception:
+        return 0, 0, 0, 255
+
+
 def _convert_lab_to_rgb(L, a, b, alpha):
     """Convert LAB color values to RGB QColor."""
+    return QColor(*_lab_to_rgba(L, a, b, alpha))
+
+
+def _parse_colors(color_defs: List[Dict[str, Any]]) -> List[QColor]:
+    """Parse a list of CIM colors, converting all LAB stops in one batch."""
+    lab_index = [
+        i for i, c in enumerate(color_defs)
+        if isinstance(c, dict) and c.get("type") == "CIMLABColor"
+        and len(c.get("values") or ()) >= 3
+    ]
+    if len(lab_index) < 2:
+        return [parse_color(c) for c in color_defs]
+
+    colors = [None] * len(color_defs)
+    lab_vals = [color_defs[i]["values"] for i in lab_index]
     try:
-        # LAB to XYZ conversion (D65 illuminant)
-        fy = (L + 16.0) / 116.0
-        fx = fy + (a / 500.0)
-        fz = fy - (b / 200.0)
-        
-        def f_inv(t):
-            delta = 6.0 / 29.0
-            if t > delta:
-                return t ** 3
-            else:
-                return 3 * (delta ** 2) * (t - 4.0 / 29.0)
-        
-        # XYZ values 
-        X = 95.047 * f_inv(fx)
-        Y = 100.000 * f_inv(fy)
-        Z = 108.883 * f_inv(fz)
-        
-        # XYZ to RGB conversion (sRGB color space)
-        X /= 100.0
-        Y /= 100.0
-        Z /= 100.0
-        
-        R = X * 3.2406 + Y * -1.5372 + Z * -0.4986
-        G = X * -0.9689 + Y * 1.8758 + Z * 0.0415
-        B = X * 0.0557 + Y * -0.2040 + Z * 1.0570
-        
-        def gamma_correct(c):
-            if c > 0.0031308:
-                return 1.055 * (c ** (1.0 / 2.4)) - 0.055
-            else:
-                return 12.92 * c
-        
-        R = gamma_correct(R)
-        G = gamma_correct(G)
-        B = gamma_correct(B)
-        
-        R = max(0, min(255, int(R * 255)))
-        G = max(0, min(255, int(G * 255)))
-        B = max(0, min(255, int(B * 255)))
-        A = max(0, min(255, int(alpha * 2.55))) 
-        
-        return QColor(R, G, B, A)
+        rgba = _lab_to_rgb_vec(
+            [v[0] for v in lab_vals],
+            [v[1] for v in lab_vals],
+            [v[2] for v in lab_vals],
+            [v[3] if len(v) > 3 else 100 for v in lab_vals],
+        ).tolist()
     except Exception:
-        return QColor(0, 0, 0, 255)
+        return [parse_color(c) for c in color_defs]
+    for i, channels in zip(lab_index, rgba):
+        colors[i] = QColor(*channels)
+    return [c if c is not None else parse_color(d) for c, d in zip(colors, color_defs)]
     
 
 def extract_colors_from_ramp(color_ramp: Dict[str, Any]) -> List[QColor]:
@@ -140,18 +209,11 @@ def extract_colors_from_ramp(color_ramp: Dict[str, Any]) -> List[QColor]:
         sub_ramps = color_ramp.get("colorRamps", [])
         
         if sub_ramps:
-            # Get the first color from the first ramp
-            if sub_ramps[0].get("fromColor"):
-                colors.append(parse_color(sub_ramps[0]["fromColor"]))
-            
-            # Get intermediate colors
-            for ramp in sub_ramps[:-1]:
-                if ramp.get("toColor"):
-                    colors.append(parse_color(ramp["toColor"]))
-            
-            # Get the final color
-            if sub_ramps[-1].get("toColor"):
-                colors.append(parse_color(sub_ramps[-1]["toColor"]))
+            # First color from the first ramp, then every ramp's end color
+            color_defs = [sub_ramps[0].get("fromColor")]
+            color_defs.extend(ramp.get("toColor") for ramp in sub_ramps)
+            # Multipart stops are often LAB, so convert them in one pass
+            colors = _parse_colors([c for c in color_defs if c])
     
     # 3. Fallback: Prectral/Fixed (If encountered, try to find keys)
     elif "fromColor" in color_ramp and "toColor" in color_ramp:
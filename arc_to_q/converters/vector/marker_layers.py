@@ -97,7 +97,6 @@ def create_simple_marker_from_vector(layer_def: Dict[str, Any]) -> Optional[QgsS
 
         return marker_layer
     except Exception as e:
-        print(f"ERROR in create_simple_marker_from_vector: {e}")
         logger.error(f"Failed to create simple marker from vector: {e}")
         return None
 
@@ -172,6 +171,26 @@ def create_picture_marker_from_def(layer_def: Dict[str, Any]) -> Optional[QgsRas
         logger.error(f"Failed to create picture marker: {e}")
         return None
 
+def _square_or_diamond(points):
+    """Classify a closed 4-sided ring: a diamond has its vertices on the axes."""
+    unique_x = {p[0] for p in points}
+    unique_y = {p[1] for p in points}
+    if len(unique_x) == 3 and len(unique_y) == 3:
+        return QgsSimpleMarkerSymbolLayer.Diamond
+    return QgsSimpleMarkerSymbolLayer.Square
+
+
+# Closed-ring vertex count (first point repeated) to QGIS shape
+_RING_SHAPE = {
+    4: QgsSimpleMarkerSymbolLayer.Triangle,
+    5: _square_or_diamond,
+    6: QgsSimpleMarkerSymbolLayer.Pentagon,
+    7: QgsSimpleMarkerSymbolLayer.Hexagon,
+    11: QgsSimpleMarkerSymbolLayer.Star,
+    13: QgsSimpleMarkerSymbolLayer.Cross,
+}
+
+
 def _determine_marker_shape(layer_def: Dict[str, Any]):
     """
     Determine the QGIS marker shape from ArcGIS marker definition.
@@ -206,13 +225,10 @@ def _determine_marker_shape(layer_def: Dict[str, Any]):
     
     if "rings" in geometry:
         points = geometry["rings"][0]
-        point_count = len(points)
-        if point_count == 5:
-            unique_x = {p[0] for p in points}
-            unique_y = {p[1] for p in points}
-            return (QgsSimpleMarkerSymbolLayer.Diamond if len(unique_x) == 3 and len(unique_y) == 3 else QgsSimpleMarkerSymbolLayer.Square), False
-        shape_map = {4: QgsSimpleMarkerSymbolLayer.Triangle, 6: QgsSimpleMarkerSymbolLayer.Pentagon, 7: QgsSimpleMarkerSymbolLayer.Hexagon, 11: QgsSimpleMarkerSymbolLayer.Star, 13: QgsSimpleMarkerSymbolLayer.Cross}
-        return shape_map.get(point_count, QgsSimpleMarkerSymbolLayer.Circle), False
+        shape = _RING_SHAPE.get(len(points), QgsSimpleMarkerSymbolLayer.Circle)
+        if callable(shape):
+            shape = shape(points)
+        return shape, False
         
     elif "curveRings" in geometry:
         curve_points = [p for p in geometry["curveRings"][0] if isinstance(p, list)]
@@ -8,7 +8,8 @@ It handles the three main renderer types: Simple, Categorized (Unique Values), a
 from typing import Optional, List, Dict, Any, Union
 import logging
 import re
-import xml.etree.ElementTree as ET
+
+from lxml import etree
 
 from qgis.core import (
     QgsVectorLayer,
@@ -47,6 +48,9 @@ from .expression_translator import translate_arcade_expression
 
 logger = logging.getLogger(__name__)
 
+# QLRs can embed large base64 symbols, so lift libxml2's text node size limit
+_QLR_PARSER = etree.XMLParser(huge_tree=True)
+
 class RendererCreationError(Exception):
     """Raised when renderer creation fails."""
     pass
@@ -313,7 +317,7 @@ class VectorRenderer:
                 categories_with_names.sort(key=lambda item: draw_order_map.get(item[1], -1), reverse=True)
                 
             else:
-                print("WARNING: 'symbolLayerDrawing' key found, but 'symbolLayers' is empty.")
+                logger.warning("'symbolLayerDrawing' key found, but 'symbolLayers' is empty.")
 
         renderer = QgsCategorizedSymbolRenderer(field_name)
         
@@ -746,25 +750,48 @@ class VectorRenderer:
             if size_field:
                 renderer.setSizeScaleField(size_field)
     
+    @staticmethod
+    def uses_symbol_levels(layer_def: dict) -> bool:
+        """Returns True if the layer definition enables symbol layer drawing."""
+        symbol_drawing_def = layer_def.get('symbolLayerDrawing')
+        return bool(symbol_drawing_def and symbol_drawing_def.get('useSymbolLayerDrawing'))
+
     @staticmethod
     def post_process_qlr_for_symbol_levels(qlr_string: str, layer_def: dict) -> str:
         """
         Injects symbol level information and corrects category order in a QLR XML string.
         This version fixes a bug where categories sharing an internal symbol name were being overwritten.
         """
-        symbol_drawing_def = layer_def.get('symbolLayerDrawing')
-        if not symbol_drawing_def or not symbol_drawing_def.get('useSymbolLayerDrawing'):
+        if not VectorRenderer.uses_symbol_levels(layer_def):
             return qlr_string
 
         try:
-            tree = ET.fromstring(qlr_string)
-        except ET.ParseError as e:
+            # Encode first: lxml rejects str input that carries an XML encoding declaration
+            tree = etree.fromstring(qlr_string.encode('utf-8'), _QLR_PARSER)
+        except etree.XMLSyntaxError as e:
             logger.error(f"Failed to parse QLR XML: {e}")
             return qlr_string # Return original string if XML is invalid
 
+        if not VectorRenderer.apply_symbol_levels(tree, layer_def):
+            return qlr_string
+
+        return etree.tostring(tree, encoding='unicode')
+
+    @staticmethod
+    def apply_symbol_levels(tree: etree._Element, layer_def: dict) -> bool:
+        """
+        Reorders categories and writes the <symbollevels> block into an already parsed QLR tree.
+
+        Returns:
+            bool: True if the tree was modified, False if there was nothing to apply.
+        """
+        symbol_drawing_def = layer_def.get('symbolLayerDrawing')
+        if not symbol_drawing_def or not symbol_drawing_def.get('useSymbolLayerDrawing'):
+            return False
+
         renderer_node = tree.find('.//renderer-v2')
         if renderer_node is None or renderer_node.get('type') != 'categorizedSymbol':
-            return qlr_string
+            return False
 
         # 1. Get the ArcGIS drawing order and renderer definition
         symbol_layers_order = symbol_drawing_def.get('symbolLayers', [])
@@ -773,7 +800,7 @@ class VectorRenderer:
         categories_node = renderer_node.find('categories')
 
         if categories_node is None:
-            return qlr_string
+            return False
 
         # 2. Build a list of tuples: (XML_element, arc_symbol_name) for all categories found
         label_to_element_map = {cat.get('label'): cat for cat in categories_node.findall('category')}
@@ -808,14 +835,14 @@ class VectorRenderer:
         if existing_symbollevels is not None:
             renderer_node.remove(existing_symbollevels)
         
-        symbollevels_node = ET.SubElement(renderer_node, 'symbollevels')
+        symbollevels_node = etree.SubElement(renderer_node, 'symbollevels')
         
-        # Map labels to symbol IDs from the XML
+        # Map labels to symbol IDs from the XML, indexing the symbols once by name
+        symbols_by_name = {sym.get('name'): sym for sym in renderer_node.iterfind('.//symbols/symbol')}
         label_to_id_map = {}
         for cat_node in categories_node.findall('category'):
             label = cat_node.get('label')
-            symbol_name = cat_node.get('symbol')
-            symbol_node = renderer_node.find(f".//symbols/symbol[@name='{symbol_name}']")
+            symbol_node = symbols_by_name.get(cat_node.get('symbol'))
             if label and symbol_node is not None:
                 layer_node = symbol_node.find('layer')
                 if layer_node is not None:
@@ -828,9 +855,8 @@ class VectorRenderer:
             
             if symbol_id:
                 rank = i  # The rank is its position in the sorted list
-                ET.SubElement(symbollevels_node, 'symbollevel', {
+                etree.SubElement(symbollevels_node, 'symbollevel', {
                     'id': symbol_id, 'level': str(rank), 'pass': '0', 'locked': '0'
                 })
 
-        return ET.tostring(tree, encoding='unicode')
-
+        return True
@@ -0,0 +1,58 @@
+import unittest
+from arc_to_q.converters.lyrx_converter import (
+    _scan_xml_dataconnection,
+    _parse_xml_dataconnection_regex,
+)
+
+
+class TestXmlDataConnection(unittest.TestCase):
+    WORKSPACE_XML = (
+        '<CIMStandardDataConnection xsi:type="typens:CIMStandardDataConnection" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xmlns:typens="http://www.esri.com/schemas/ArcGIS/3.0.0">'
+        '<WorkspaceConnectionString>DATABASE=C:\\Data\\Rasters;</WorkspaceConnectionString>'
+        '<WorkspaceFactory>Raster</WorkspaceFactory>'
+        '<Dataset>elevation.tif</Dataset>'
+        '<DatasetType>esriDTAny</DatasetType>'
+        '</CIMStandardDataConnection>'
+    )
+    NESTED_XML = (
+        '<XmlRasterDataset xsi:type="typens:XmlRasterDataset" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xmlns:typens="http://www.esri.com/schemas/ArcGIS/3.0.0">'
+        '<Function xsi:type="typens:GeometricFunction"><Name>Geometric_Function.tif</Name></Function>'
+        '<FunctionRasterDatasetName xsi:type="typens:RasterDatasetName">'
+        '<WorkspaceName><PathName>D:\\Maps\\Basemap</PathName></WorkspaceName>'
+        '<Name>hillshade.TIF</Name>'
+        '</FunctionRasterDatasetName>'
+        '</XmlRasterDataset>'
+    )
+    FALLBACK_XML = (
+        '<Root><PathName>E:\\Imagery</PathName>'
+        '<Name>Clip_Function.png</Name>'
+        '<Name>scan.jpg</Name></Root>'
+    )
+    NO_MATCH_XML = '<Root><PathName>E:\\Imagery</PathName><Name>notes.txt</Name></Root>'
+
+    def test_scanner_matches_regex_parser(self):
+        for xml in (self.WORKSPACE_XML, self.NESTED_XML, self.FALLBACK_XML, self.NO_MATCH_XML):
+            with self.subTest(xml=xml[:40]):
+                self.assertEqual(_scan_xml_dataconnection(xml), _parse_xml_dataconnection_regex(xml))
+
+    def test_scanner_finds_expected_sources(self):
+        self.assertEqual(_scan_xml_dataconnection(self.WORKSPACE_XML)["dataset"], "elevation.tif")
+        self.assertEqual(_scan_xml_dataconnection(self.NESTED_XML)["dataset"], "hillshade.TIF")
+        self.assertEqual(_scan_xml_dataconnection(self.FALLBACK_XML)["dataset"], "scan.jpg")
+        self.assertIsNone(_scan_xml_dataconnection(self.NO_MATCH_XML))
+
+    def test_scanner_does_not_expand_external_entities(self):
+        xml = (
+            '<!DOCTYPE r [<!ENTITY ext SYSTEM "file:///etc/hostname">]>'
+            '<r><WorkspaceConnectionString>DATABASE=C:\\Data;</WorkspaceConnectionString>'
+            '<Dataset>&ext;</Dataset></r>'
+        )
+        self.assertIsNone(_scan_xml_dataconnection(xml))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from arc_to_q.converters.raster.stretch_renderer import (
+    _RAMP_COLOR_TOLERANCE,
+    _histogram_equalize_ramp,
+)
+
+BLUE_GREEN_RED = np.array([(0, 0, 255), (0, 255, 0), (255, 0, 0)], dtype=np.float64)
+
+
+class TestHistogramEqualizeRamp(unittest.TestCase):
+    def assert_thinned_matches_full(self, histogram, vmin=0.0, vmax=100.0, exponent=1.0):
+        values, palette_rgb, keep = _histogram_equalize_ramp(
+            BLUE_GREEN_RED, histogram, vmin, vmax, exponent
+        )
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], len(values) - 1)
+        self.assertEqual(values[0], vmin)
+        self.assertEqual(values[-1], vmax)
+
+        kept = np.asarray(keep)
+        for i in sorted(set(range(len(values))) - set(keep)):
+            # The kept items on either side of the dropped entry
+            hi = np.searchsorted(kept, i)
+            lo_i, hi_i = kept[hi - 1], kept[hi]
+            span = values[hi_i] - values[lo_i]
+            t = (values[i] - values[lo_i]) / span if span > 0 else 0.0
+            thinned = palette_rgb[lo_i] + t * (palette_rgb[hi_i] - palette_rgb[lo_i])
+            error = np.abs(thinned - palette_rgb[i]).max()
+            self.assertLessEqual(error, _RAMP_COLOR_TOLERANCE, f"entry {i} off by {error:.2f}")
+
+        if np.all(np.diff(values) > 0):
+            # Where the ramp is strictly increasing, sample it the way the shader does
+            # at every entry and halfway between entries
+            samples = np.concatenate([values, (values[:-1] + values[1:]) / 2])
+            for c in range(3):
+                full = np.interp(samples, values, palette_rgb[:, c])
+                thinned = np.interp(samples, values[kept], palette_rgb[kept, c])
+                np.testing.assert_allclose(thinned, full, atol=_RAMP_COLOR_TOLERANCE)
+        return values, palette_rgb, keep
+
+    def test_sparse_histogram_end_segment(self):
+        values, palette_rgb, keep = self.assert_thinned_matches_full([5, 0, 10, 0, 0])
+
+        # Rendered color just above the middle break matches the full 256-item ramp
+        full = [np.interp(50.01, values, palette_rgb[:, c]) for c in range(3)]
+        thinned = [np.interp(50.01, values[keep], palette_rgb[keep, c]) for c in range(3)]
+        np.testing.assert_allclose(thinned, full, atol=_RAMP_COLOR_TOLERANCE)
+
+    def test_random_histograms(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            num_bins = int(rng.integers(2, 300))
+            histogram = rng.integers(0, 1000, num_bins) * (rng.random(num_bins) > 0.3)
+            exponent = float(rng.choice([1.0, 0.5, 2.0]))
+            with self.subTest(num_bins=num_bins, exponent=exponent):
+                self.assert_thinned_matches_full(histogram.tolist(), -20.0, 380.0, exponent)
+
+    def test_thins_smooth_ramp(self):
+        _, _, keep = self.assert_thinned_matches_full([1] * 256)
+        self.assertLess(len(keep), 256)
+
+
+if __name__ == "__main__":
+    unittest.main()
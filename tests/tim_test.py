@@ -4,6 +4,7 @@
     & "C:\Program Files\QGIS 3.40.12\bin\python-qgis-ltr.bat" .\tests\tim_test.py
 """
 
+import logging
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -31,6 +32,8 @@ def _get_lyrx_in_folder(folder, recursive=True):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     output_folder = r'G:\Current_Database\Map_Layers_QGIS'
 
     ithk = r'G:\Current_Database\Map_Layers\Data_For_Each_Unit\24_MM\Well Interval Thickness.lyrx'
@@ -4,6 +4,7 @@
     & "C:\Program Files\QGIS 3.40.10\bin\python-qgis-ltr.bat" .\tests\vince_test.py
 """
 
+import logging
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -16,6 +17,8 @@ from arc_to_q.converters.lyrx_converter import convert_lyrx
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     output_folder = 'G:/Projects/QGIS Support/test_results'
     in_lyrx = "G:/Working/Students/Undergraduate/For_Vince/ArcGIS_AddOn/ArcGISPaleo_AddOn/dummy.lyrx"
 